@@ -0,0 +1,55 @@
+"""Benchmark corpora: the repository's brain_cancer.txt plus seeded synthetic documents"""
+import random
+from pathlib import Path
+from typing import List
+
+BRAIN_CANCER = Path(__file__).resolve().parents[2] / "brain_cancer.txt"
+
+GENES = ["EGFR", "IDH1", "IDH2", "TP53", "PTEN", "ATRX", "TERT", "MGMT", "CDKN2A", "BRAF", "NF1", "PDGFRA"]
+DRUGS = ["Temozolomide", "Bevacizumab", "Lomustine", "Carmustine", "Dabrafenib", "Vorasidenib", "Everolimus"]
+TUMOURS = ["Glioblastoma", "Astrocytoma", "Oligodendroglioma", "Medulloblastoma", "Ependymoma", "Meningioma"]
+FILLER = (
+    "patients cohort survival median months treatment response imaging resection radiotherapy "
+    "mutation expression pathway tumour growth trial phase outcome progression biopsy grade "
+    "analysis risk marker therapy dose toxicity recurrence sequencing signalling methylation"
+).split()
+
+
+def brain_cancer() -> List[str]:
+    return [BRAIN_CANCER.read_text()]
+
+
+def synthetic(docs: int, words_per_doc: int = 1500, seed: int = 7) -> List[str]:
+    """Documents mixing a fixed vocabulary of entities into filler text; same seed, same corpus"""
+    rng = random.Random(seed)
+    # Extra per-corpus entities make the graph grow with the corpus instead of saturating
+    extra = [f"Trial-{n:04d}" for n in range(max(10, docs * 5))]
+    entities = GENES + DRUGS + TUMOURS
+    corpus = []
+    for index in range(docs):
+        sentences = []
+        words = 0
+        while words < words_per_doc:
+            length = rng.randint(12, 24)
+            sentence = [rng.choice(FILLER) for _ in range(length)]
+            for _ in range(rng.randint(1, 3)):
+                sentence.insert(rng.randrange(length), rng.choice(entities if rng.random() < 0.7 else extra))
+            text = " ".join(sentence)
+            sentences.append(text[0].upper() + text[1:] + ".")
+            words += len(sentence)
+        corpus.append(f"Document {index}.\n" + " ".join(sentences))
+    return corpus
+
+
+def queries(count: int, seed: int = 11) -> List[str]:
+    rng = random.Random(seed)
+    templates = [
+        "What is known about {a}?",
+        "How does {a} relate to {b} in {c}?",
+        "Which treatments target {a}?",
+        "What are the main themes across studies of {c}?",
+    ]
+    return [
+        rng.choice(templates).format(a=rng.choice(GENES), b=rng.choice(DRUGS), c=rng.choice(TUMOURS)) + f" (#{n})"
+        for n in range(count)
+    ]
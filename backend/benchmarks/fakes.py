@@ -0,0 +1,111 @@
+"""Deterministic stand-ins for the OpenAI models and the hosted storages, so benchmarks run offline"""
+import asyncio
+import hashlib
+import json
+import re
+from typing import List
+
+import numpy as np
+from lightrag.prompt import PROMPTS
+from lightrag.storage import JsonKVStorage, NanoVectorDBStorage, NetworkXStorage
+from lightrag.utils import EmbeddingFunc
+
+from src.graph_rag.metrics import instrument_storage
+from src.graph_rag.services import register_storage
+
+EMBEDDING_DIM = 64
+MAX_ENTITIES_PER_CHUNK = 12
+ENTITY_PATTERN = re.compile(r"\b[A-Z][A-Za-z0-9-]{2,}\b")
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9-]+")
+TUPLE = PROMPTS["DEFAULT_TUPLE_DELIMITER"]
+RECORD = PROMPTS["DEFAULT_RECORD_DELIMITER"]
+COMPLETE = PROMPTS["DEFAULT_COMPLETION_DELIMITER"]
+
+BENCH_STORAGE = {
+    "graph_storage": "BenchGraphStorage",
+    "vector_storage": "BenchVectorStorage",
+    "kv_storage": "BenchKVStorage",
+}
+
+# LightRAG's file-backed storages, with every public async method counted and timed under
+# graphrag_storage_seconds{backend=...}, the same metric the Neo4j and Pinecone storages report
+register_storage("BenchGraphStorage", instrument_storage("networkx")(type("BenchGraphStorage", (NetworkXStorage,), {})))
+register_storage("BenchVectorStorage", instrument_storage("nano_vectordb")(type("BenchVectorStorage", (NanoVectorDBStorage,), {})))
+register_storage("BenchKVStorage", instrument_storage("json_kv")(type("BenchKVStorage", (JsonKVStorage,), {})))
+
+
+def _entities(text: str) -> List[str]:
+    seen = []
+    for name in ENTITY_PATTERN.findall(text):
+        if name.upper() not in seen:
+            seen.append(name.upper())
+        if len(seen) >= MAX_ENTITIES_PER_CHUNK:
+            break
+    return seen
+
+
+def _between(prompt: str, start: str, end: str) -> str:
+    _, found, tail = prompt.rpartition(start)
+    return tail.split(end, 1)[0] if found else ""
+
+
+class FakeLLM:
+    """
+    Answers each LightRAG prompt with well-formed output derived from its input: capitalised
+    words become entities linked in sequence, queries yield keyword JSON, and answers
+    report the context size. latency_ms adds a fixed wait per call to mimic a network round trip.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.calls = 0
+
+    async def __call__(self, prompt, system_prompt=None, history_messages=[], keyword_extraction=False, **kwargs) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if keyword_extraction:
+            return self._keywords(_between(prompt, "Query:", "\n"))
+        if prompt.startswith("-Goal-"):
+            return self._extraction(_between(prompt, "Text:", "######################\nOutput:"))
+        if prompt == PROMPTS["entiti_continue_extraction"]:
+            return ""
+        if prompt == PROMPTS["entiti_if_loop_extraction"]:
+            return "no"
+        if "Description List:" in prompt:
+            return _between(prompt, "Description List:", "#######").strip()[:500]
+        context = len(system_prompt or "")
+        return f"Deterministic answer to {prompt[:80]!r} from {context} characters of context."
+
+    def _keywords(self, query: str) -> str:
+        words = WORD_PATTERN.findall(query)
+        low = [word for word in words if word[0].isupper()] or words[-2:]
+        high = [word.lower() for word in words if len(word) > 5] or words[:2]
+        return json.dumps({"high_level_keywords": high, "low_level_keywords": low})
+
+    def _extraction(self, text: str) -> str:
+        names = _entities(text)
+        records = [
+            f'("entity"{TUPLE}"{name}"{TUPLE}"category"{TUPLE}"{name} as mentioned in the text.")'
+            for name in names
+        ]
+        records += [
+            f'("relationship"{TUPLE}"{src}"{TUPLE}"{tgt}"{TUPLE}"{src} appears alongside {tgt}."{TUPLE}"co-occurrence"{TUPLE}0.5)'
+            for src, tgt in zip(names, names[1:])
+        ]
+        return RECORD.join(records) + COMPLETE
+
+
+async def _fake_embed(texts: List[str]) -> np.ndarray:
+    # Hashed bag of words: deterministic, and texts sharing words land close together
+    vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in WORD_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=4).digest()
+            vectors[row, int.from_bytes(digest, "little") % EMBEDDING_DIM] += 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def fake_embedding_func() -> EmbeddingFunc:
+    return EmbeddingFunc(embedding_dim=EMBEDDING_DIM, max_token_size=8192, func=_fake_embed)
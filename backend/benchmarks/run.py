@@ -0,0 +1,248 @@
+"""
+Offline benchmark for GraphRAGService ingestion throughput and query latency.
+
+    cd backend
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 10,100,500 --queries 50 --llm-latency-ms 20
+    python -m benchmarks.run --compare benchmarks/results/<earlier run>.json
+
+create_graph and run_query run unchanged, but against the deterministic fake LLM and embedding
+in benchmarks.fakes and LightRAG's local JSON, NanoVectorDB and NetworkX storages, so only this
+repository's code is measured. tiktoken still needs its BPE files; without network access point
+TIKTOKEN_CACHE_DIR at a directory that already holds them. Each run is saved to
+benchmarks/results/ as JSON named after the commit, for comparison across commits.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from loguru import logger
+from prometheus_client import REGISTRY
+
+from src.graph_rag.cache import AnswerCache
+from src.graph_rag.models import PutBlobResult
+from src.graph_rag.pool import shutdown_process_pool
+from src.graph_rag.services import GraphRAGService
+
+from . import corpus
+from .fakes import BENCH_STORAGE, FakeLLM, fake_embedding_func
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+MODES = ["naive", "local", "global", "hybrid"]
+
+
+def storage_calls() -> Dict[str, int]:
+    calls = {}
+    for metric in REGISTRY.collect():
+        if metric.name != "graphrag_storage_seconds":
+            continue
+        for sample in metric.samples:
+            if sample.name.endswith("_count"):
+                calls[f"{sample.labels['backend']}.{sample.labels['method']}"] = int(sample.value)
+    return calls
+
+
+def calls_since(before: Dict[str, int]) -> Dict[str, int]:
+    after = storage_calls()
+    delta = {key: count - before.get(key, 0) for key, count in after.items()}
+    return {key: count for key, count in sorted(delta.items()) if count}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def latency_summary(seconds: List[float]) -> dict:
+    ms = [value * 1000 for value in seconds]
+    return {
+        "queries": len(ms),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(sum(ms) / len(ms), 2),
+    }
+
+
+async def run_corpus(name: str, docs: List[str], args) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="graphrag-bench-"))
+    try:
+        llm = FakeLLM(args.llm_latency_ms)
+        service = GraphRAGService(
+            base_path=str(workdir / "data"),
+            working_dir=str(workdir / "rag"),
+            storage={**BENCH_STORAGE, "graph_storage": args.graph_storage},
+            llm_model_func=llm,
+            embedding_func=fake_embedding_func(),
+        )
+        service.answer_cache = AnswerCache()
+        await service.setup_directories()
+        logging.getLogger("lightrag").setLevel(logging.WARNING)
+
+        paths = []
+        (workdir / "docs").mkdir()
+        for index, text in enumerate(docs):
+            path = workdir / "docs" / f"{name}-{index}.txt"
+            path.write_text(text)
+            paths.append(str(path))
+        data = PutBlobResult(
+            urls=[f"file://{path}" for path in paths],
+            download_urls=[f"file://{path}" for path in paths],
+            pathnames=paths,
+            content_types=["text/plain"] * len(paths),
+            content_dispositions=["attachment"] * len(paths),
+        )
+
+        if args.memory:
+            tracemalloc.start()
+        before = storage_calls()
+        llm_calls = llm.calls
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await service.create_graph(data)
+        ingest_seconds = time.perf_counter() - started
+        ingest = {
+            "seconds": round(ingest_seconds, 3),
+            "docs_per_second": round(len(docs) / ingest_seconds, 3),
+            "chars_per_second": round(sum(len(doc) for doc in docs) / ingest_seconds, 1),
+            "llm_calls": llm.calls - llm_calls,
+            "storage_calls": calls_since(before),
+        }
+        if args.memory:
+            ingest["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            tracemalloc.reset_peak()
+
+        queries = {}
+        semaphore = asyncio.Semaphore(args.concurrency)
+        for mode in MODES:
+            latencies = []
+
+            async def timed_query(query):
+                async with semaphore:
+                    started = time.perf_counter()
+                    await service.run_query(query, method=mode)
+                    latencies.append(time.perf_counter() - started)
+
+            before = storage_calls()
+            with contextlib.redirect_stdout(io.StringIO()):
+                await asyncio.gather(*[timed_query(query) for query in corpus.queries(args.queries)])
+            queries[mode] = {**latency_summary(latencies), "storage_calls": calls_since(before)}
+
+        result = {"corpus": name, "docs": len(docs), "chars": sum(len(doc) for doc in docs), "ingest": ingest, "query": queries}
+        if args.memory:
+            result["query_peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            tracemalloc.stop()
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(report: dict, baseline: dict = None):
+    previous = {run["corpus"]: run for run in (baseline or {}).get("runs", [])}
+
+    def fmt(value, old, higher_is_better=False):
+        if old is None or not old:
+            return f"{value}"
+        change = (value - old) / old * 100
+        better = change > 0 if higher_is_better else change < 0
+        return f"{value} ({change:+.1f}%{'' if abs(change) < 5 else ' better' if better else ' worse'})"
+
+    for run in report["runs"]:
+        old = previous.get(run["corpus"])
+        print(f"\n{run['corpus']}: {run['docs']} docs, {run['chars']} chars")
+        ingest = run["ingest"]
+        old_ingest = old["ingest"] if old else {}
+        print(f"  ingest     {fmt(ingest['docs_per_second'], old_ingest.get('docs_per_second'), True)} docs/s, "
+              f"{fmt(sum(ingest['storage_calls'].values()), sum(old_ingest.get('storage_calls', {}).values()) or None)} storage calls"
+              + (f", peak {fmt(ingest['peak_traced_mb'], old_ingest.get('peak_traced_mb'))} MB" if "peak_traced_mb" in ingest else ""))
+        for mode, stats in run["query"].items():
+            old_stats = old["query"].get(mode, {}) if old else {}
+            print(f"  {mode:<10} p50 {fmt(stats['p50_ms'], old_stats.get('p50_ms'))} ms, "
+                  f"p95 {fmt(stats['p95_ms'], old_stats.get('p95_ms'))} ms, "
+                  f"p99 {fmt(stats['p99_ms'], old_stats.get('p99_ms'))} ms, "
+                  f"{sum(stats['storage_calls'].values()) / stats['queries']:.1f} storage calls/query")
+
+
+async def main(args):
+    corpora = [("brain_cancer", corpus.brain_cancer())]
+    corpora += [(f"synthetic_{size}", corpus.synthetic(size, args.words_per_doc)) for size in args.sizes]
+
+    runs = []
+    try:
+        for name, docs in corpora:
+            print(f"Running {name} ({len(docs)} docs)...", file=sys.stderr)
+            runs.append(await run_corpus(name, docs, args))
+    finally:
+        shutdown_process_pool()
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "sizes": args.sizes,
+            "words_per_doc": args.words_per_doc,
+            "queries_per_mode": args.queries,
+            "concurrency": args.concurrency,
+            "llm_latency_ms": args.llm_latency_ms,
+            "memory_traced": args.memory,
+            "graph_storage": args.graph_storage,
+        },
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "runs": runs,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['timestamp'][:19].replace(':', '')}-{report['revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Saved {output}", file=sys.stderr)
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_results(report, baseline)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",") if size], default=[10, 50],
+                        help="synthetic corpus sizes in documents, comma separated (default: 10,50)")
+    parser.add_argument("--words-per-doc", type=int, default=1500)
+    parser.add_argument("--queries", type=int, default=20, help="queries per mode (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=1, help="queries in flight at once (default: 1)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated latency of each LLM call")
+    parser.add_argument("--graph-storage", default=BENCH_STORAGE["graph_storage"],
+                        help="graph storage class to run against, e.g. CSRGraphStorage (default: NetworkX)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip tracemalloc, which slows Python code down")
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="earlier results JSON to print changes against")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    asyncio.run(main(parse_args()))
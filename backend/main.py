@@ -1,10 +1,34 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.graph_rag import router as graph_rag_router
 from src.graph_rag.services import GraphRAGService
+from src.graph_rag.metrics import mark_process_dead, metrics_middleware
+from src.utils.logger import logger
+from src.utils.tracing import tracing_middleware
 
-app = FastAPI()
-graph_rag_service = None  # Global variable to store the service instance
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker process, after the fork, so every worker opens its own
+    # database connections and process pool instead of inheriting the parent's
+    logger.info("Starting up...")
+    graph_rag_service = GraphRAGService()
+    app.state.graph_rag_service = graph_rag_service
+    try:
+        # Inside the try, so connections opened before a failed warm-up are still closed
+        await graph_rag_service.start()
+        yield
+    finally:
+        logger.info("Shutting down...")
+        await graph_rag_service.drain()
+        try:
+            await graph_rag_service.close()
+        finally:
+            mark_process_dead()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -15,21 +39,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize GraphRAG service
+# Request latency and in-flight request metrics
+app.middleware("http")(metrics_middleware)
 
-
-@app.on_event("startup")
-async def startup_event():
-    print("Starting up...")
-    global graph_rag_service
-    graph_rag_service = GraphRAGService()
-    await graph_rag_service.setup_directories()
+# One trace per request; exported to TRACE_EXPORT_PATH when set
+app.middleware("http")(tracing_middleware)
 
 # Include GraphRAG routes
 app.include_router(graph_rag_router, prefix="/api/v1")
-
-
-
-
-
-
@@ -1,5 +1,5 @@
 from .routes import router
 from .services import GraphRAGService
-from .models import UploadFiles, Search
+from .models import UploadFiles, UploadJob, RetrievalOptions, Search
 
-__all__ = ['router', 'GraphRAGService', 'UploadFiles', 'Search'] 
\ No newline at end of file
+__all__ = ['router', 'GraphRAGService', 'UploadFiles', 'UploadJob', 'RetrievalOptions', 'Search'] 
\ No newline at end of file
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from ..utils.logger import logger
+
+ANSWER_CACHE_TTL = int(os.environ.get("ANSWER_CACHE_TTL", 3600))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", 1024))
+KEY_PREFIX = "graphrag:answer"
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+class AnswerCache:
+    """
+    Cache of generated answers keyed by normalized query, mode, query parameters and a
+    corpus version. Every successful ingest bumps the version, so stale answers are never
+    served after new documents arrive. Callers read the version before running a query and
+    pass it to get and set, so an answer computed while an ingest lands is stored under the
+    old version. Redis is used when REDIS_URL is set (shared across workers; bound its size
+    with a maxmemory-policy), with a per-process LRU as fallback. The fallback only sees
+    ingests handled by its own process, so it is off when there is more than one worker.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, ttl: int = ANSWER_CACHE_TTL, max_entries: int = ANSWER_CACHE_MAX_ENTRIES, memory_fallback: bool = True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_fallback = memory_fallback
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._version = 0
+        self._redis = None
+        if redis_url:
+            try:
+                import redis.asyncio as redis
+                self._redis = redis.from_url(redis_url, decode_responses=True)
+            except ImportError:
+                logger.warning("redis is not installed, falling back to in-process answer cache")
+
+    @classmethod
+    def from_env(cls) -> "AnswerCache":
+        redis_url = os.environ.get("REDIS_URL")
+        single_worker = int(os.environ.get("WEB_CONCURRENCY", 1)) <= 1
+        if not redis_url and not single_worker:
+            logger.warning("Answer cache disabled: WEB_CONCURRENCY > 1 needs REDIS_URL to invalidate answers across workers")
+        return cls(redis_url=redis_url, memory_fallback=single_worker)
+
+    async def close(self) -> None:
+        if self._redis:
+            await self._redis.aclose()
+
+    async def corpus_version(self, scope: str = "default") -> int:
+        if self._redis:
+            try:
+                return int(await self._redis.get(f"{KEY_PREFIX}:version:{scope}") or 0)
+            except Exception as e:
+                logger.warning(f"Redis unavailable for answer cache: {str(e)}")
+        return self._version
+
+    async def bump_version(self, scope: str = "default") -> None:
+        """Invalidate every cached answer for the scope; called after each successful ingest"""
+        self._version += 1
+        self._memory.clear()
+        if self._redis:
+            try:
+                await self._redis.incr(f"{KEY_PREFIX}:version:{scope}")
+            except Exception as e:
+                logger.warning(f"Redis unavailable for answer cache: {str(e)}")
+
+    def _key(self, query: str, mode: str, params: dict, scope: str, version: int) -> str:
+        payload = json.dumps([scope, version, normalize_query(query), mode, params], sort_keys=True)
+        return f"{KEY_PREFIX}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    async def get(self, query: str, mode: str, params: dict, scope: str = "default", version: Optional[int] = None) -> Optional[str]:
+        if version is None:
+            version = await self.corpus_version(scope)
+        key = self._key(query, mode, params, scope, version)
+        if self._redis:
+            try:
+                return await self._redis.get(key)
+            except Exception as e:
+                logger.warning(f"Redis unavailable for answer cache: {str(e)}")
+        if not self.memory_fallback:
+            return None
+
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, answer = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return answer
+
+    async def set(self, query: str, mode: str, params: dict, answer: str, scope: str = "default", version: Optional[int] = None) -> None:
+        """Store an answer under the corpus version read before the query ran"""
+        if version is None:
+            version = await self.corpus_version(scope)
+        key = self._key(query, mode, params, scope, version)
+        if self._redis:
+            try:
+                await self._redis.set(key, answer, ex=self.ttl)
+                return
+            except Exception as e:
+                logger.warning(f"Redis unavailable for answer cache: {str(e)}")
+        if not self.memory_fallback:
+            return
+
+        self._memory[key] = (time.monotonic() + self.ttl, answer)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,99 @@
+import asyncio
+from dataclasses import asdict
+from typing import Dict, List
+
+from lightrag import LightRAG
+from lightrag.operate import extract_entities
+from lightrag.utils import compute_mdhash_id
+
+from ..utils.logger import logger
+from .metrics import observe_stage
+from .pool import get_process_pool
+
+
+def _chunk_document(content: str, overlap_token_size: int, max_token_size: int, tiktoken_model: str) -> List[dict]:
+    # Runs in a worker process; each worker keeps its own tiktoken encoder
+    from lightrag.operate import chunking_by_token_size
+
+    return chunking_by_token_size(
+        content,
+        overlap_token_size=overlap_token_size,
+        max_token_size=max_token_size,
+        tiktoken_model=tiktoken_model,
+    )
+
+
+async def chunk_documents(rag: LightRAG, docs: Dict[str, dict]) -> Dict[str, dict]:
+    """Tokenize and split documents in the process pool using the chunk settings of the given LightRAG"""
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    doc_chunks = await asyncio.gather(*[
+        loop.run_in_executor(
+            pool,
+            _chunk_document,
+            doc["content"],
+            rag.chunk_overlap_token_size,
+            rag.chunk_token_size,
+            rag.tiktoken_model_name,
+        )
+        for doc in docs.values()
+    ])
+
+    chunks = {}
+    for doc_key, dps in zip(docs.keys(), doc_chunks):
+        for dp in dps:
+            chunks[compute_mdhash_id(dp["content"], prefix="chunk-")] = {**dp, "full_doc_id": doc_key}
+    return chunks
+
+
+async def ainsert_prechunked(rag: LightRAG, contents: List[str]) -> int:
+    """
+    Same flow as LightRAG.ainsert, but chunking happens in the process pool
+    instead of on the event loop. Returns the number of new documents inserted.
+    """
+    update_storage = False
+    try:
+        new_docs = {
+            compute_mdhash_id(c.strip(), prefix="doc-"): {"content": c.strip()}
+            for c in contents
+        }
+        _add_doc_keys = await rag.full_docs.filter_keys(list(new_docs.keys()))
+        new_docs = {k: v for k, v in new_docs.items() if k in _add_doc_keys}
+        if not new_docs:
+            logger.warning("All docs are already in the storage")
+            return 0
+        update_storage = True
+        logger.info(f"[New Docs] inserting {len(new_docs)} docs")
+
+        with observe_stage("ingest", "chunking"):
+            inserting_chunks = await chunk_documents(rag, new_docs)
+        _add_chunk_keys = await rag.text_chunks.filter_keys(list(inserting_chunks.keys()))
+        inserting_chunks = {k: v for k, v in inserting_chunks.items() if k in _add_chunk_keys}
+        if not inserting_chunks:
+            logger.warning("All chunks are already in the storage")
+            return 0
+        logger.info(f"[New Chunks] inserting {len(inserting_chunks)} chunks")
+
+        with observe_stage("ingest", "chunk_upsert"):
+            await rag.chunks_vdb.upsert(inserting_chunks)
+
+        with observe_stage("ingest", "entity_extraction"):
+            maybe_new_kg = await extract_entities(
+                inserting_chunks,
+                knowledge_graph_inst=rag.chunk_entity_relation_graph,
+                entity_vdb=rag.entities_vdb,
+                relationships_vdb=rag.relationships_vdb,
+                global_config=asdict(rag),
+            )
+        if maybe_new_kg is None:
+            logger.warning("No new entities and relationships found")
+            return 0
+        rag.chunk_entity_relation_graph = maybe_new_kg
+
+        with observe_stage("ingest", "kv_upsert"):
+            await rag.full_docs.upsert(new_docs)
+            await rag.text_chunks.upsert(inserting_chunks)
+        return len(new_docs)
+    finally:
+        if update_storage:
+            await rag._insert_done()
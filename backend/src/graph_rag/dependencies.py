@@ -0,0 +1,10 @@
+from fastapi import HTTPException, Request
+from .services import GraphRAGService
+
+
+def get_graph_rag_service(request: Request) -> GraphRAGService:
+    """The service created by the app lifespan; each worker process has its own"""
+    service = getattr(request.app.state, "graph_rag_service", None)
+    if service is None:
+        raise HTTPException(status_code=503, detail="GraphRAG service is not started")
+    return service
@@ -0,0 +1,167 @@
+import asyncio
+import mimetypes
+import os
+import tempfile
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import httpx
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from ..utils.logger import logger
+from ..utils.tracing import span
+from .pool import get_process_pool, pool_size
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+TEXT_BLOCK_CHARS = 64 * 1024
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", 20))
+SECTION_CHARS = int(os.environ.get("EXTRACTION_SECTION_CHARS", 200_000))
+
+CONTENT_KINDS = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "text/html": "html",
+    "application/xhtml+xml": "html",
+}
+
+EXTENSION_KINDS = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".html": "html",
+    ".htm": "html",
+}
+
+
+def detect_kind(content_type: Optional[str], pathname: Optional[str] = None) -> str:
+    """Map a blob content type (or, failing that, the file name) to an extractor: pdf, docx, html or text"""
+    if content_type:
+        kind = CONTENT_KINDS.get(content_type.split(";")[0].strip().lower())
+        if kind:
+            return kind
+    if pathname:
+        kind = EXTENSION_KINDS.get(Path(pathname).suffix.lower())
+        if kind:
+            return kind
+        guessed, _ = mimetypes.guess_type(pathname)
+        if guessed and guessed in CONTENT_KINDS:
+            return CONTENT_KINDS[guessed]
+    return "text"
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+async def download_to_disk(client: httpx.AsyncClient, url: str, dest_dir: str) -> Path:
+    """Stream a remote file into dest_dir chunk by chunk. Local file:// urls are returned as-is."""
+    if url.startswith("file://"):
+        return Path(url[7:])
+
+    logger.info(f"Downloading: {url}")
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix="download-")
+    try:
+        # Owns the descriptor from here on, so a failed request or status check still closes it
+        with os.fdopen(fd, "wb") as f:
+            timeout = httpx.Timeout(30.0, connect=10.0)
+            with span("fetch", url=url) as current:
+                async with client.stream("GET", url, timeout=timeout) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                if current:
+                    current.set("bytes", response.num_bytes_downloaded)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return Path(tmp_path)
+
+
+# Worker functions below run inside the process pool, so they must stay at module level.
+
+def _pdf_page_count(path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+def _extract_pdf_pages(path: str, start: int, stop: int) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return "\n\n".join(reader.pages[i].extract_text() or "" for i in range(start, stop))
+
+
+def _extract_docx(path: str) -> str:
+    from docx import Document
+
+    return "\n".join(paragraph.text for paragraph in Document(path).paragraphs)
+
+
+def _extract_html(path: str) -> str:
+    from bs4 import BeautifulSoup
+
+    with open(path, "rb") as f:
+        soup = BeautifulSoup(f, "lxml")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    return soup.get_text("\n", strip=True)
+
+
+async def _iter_pdf(path: str) -> AsyncIterator[str]:
+    """Extract page ranges in parallel, yielding them in order with a bounded number in flight"""
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    page_count = await loop.run_in_executor(pool, _pdf_page_count, path)
+    pending = deque()
+    try:
+        for start in range(0, page_count, PDF_PAGES_PER_TASK):
+            stop = min(start + PDF_PAGES_PER_TASK, page_count)
+            pending.append(loop.run_in_executor(pool, _extract_pdf_pages, path, start, stop))
+            if len(pending) >= pool_size():
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def _iter_plain_text(path: str) -> AsyncIterator[str]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            block = await asyncio.to_thread(f.read, TEXT_BLOCK_CHARS)
+            if not block:
+                break
+            yield block
+
+
+async def iter_text(path: str, kind: str) -> AsyncIterator[str]:
+    """Yield the text of a document incrementally. Parsing runs in the shared process pool."""
+    path = str(path)
+    if kind == "pdf":
+        async for segment in _iter_pdf(path):
+            yield segment
+    elif kind in ("docx", "html"):
+        extractor = _extract_docx if kind == "docx" else _extract_html
+        loop = asyncio.get_running_loop()
+        yield await loop.run_in_executor(get_process_pool(), extractor, path)
+    else:
+        async for segment in _iter_plain_text(path):
+            yield segment
+
+
+async def iter_sections(path: str, kind: str, section_chars: int = SECTION_CHARS) -> AsyncIterator[str]:
+    """
+    Group extracted text into sections of at most section_chars, cut on line boundaries
+    where possible, so large documents reach LightRAG piece by piece.
+    """
+    buffer = ""
+    async for segment in iter_text(path, kind):
+        buffer += segment
+        while len(buffer) >= section_chars:
+            cut = buffer.rfind("\n", 0, section_chars)
+            if cut <= 0:
+                cut = section_chars
+            section, buffer = buffer[:cut], buffer[cut:]
+            if section.strip():
+                yield section
+    if buffer.strip():
+        yield buffer
@@ -0,0 +1,164 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+from lightrag.utils import EmbeddingFunc
+
+from ..utils.logger import logger
+from .metrics import observe_stage
+from .scheduler import current_pipeline
+
+LOCAL_EMBEDDING_MAX_BATCH = int(os.environ.get("LOCAL_EMBEDDING_MAX_BATCH", 64))
+LOCAL_EMBEDDING_MAX_WAIT_MS = float(os.environ.get("LOCAL_EMBEDDING_MAX_WAIT_MS", 5))
+
+
+class LocalEmbeddingServer:
+    """
+    In-process sentence-transformers embedding with dynamic micro-batching.
+
+    Concurrent embed() calls from every vector storage and query are queued and merged into
+    batches of up to max_batch_size texts, waiting at most max_wait_ms for a batch to fill.
+    Inference runs on a dedicated worker thread so the event loop stays free.
+
+    Pinecone indexes are created with the embedding dimension, so switching an existing
+    deployment to a local model needs fresh indexes.
+    """
+
+    def __init__(self, model_name: str, max_batch_size: int = LOCAL_EMBEDDING_MAX_BATCH, max_wait_ms: float = LOCAL_EMBEDDING_MAX_WAIT_MS, model=None):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.model = model
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        # Request that did not fit in the previous batch
+        self._held: Optional[Tuple[List[str], asyncio.Future]] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self.busy_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional["LocalEmbeddingServer"]:
+        model_name = os.environ.get("LOCAL_EMBEDDING_MODEL")
+        return cls(model_name) if model_name else None
+
+    async def start(self):
+        """Load the model once and start the batching loop"""
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        if self.model is None:
+            from sentence_transformers import SentenceTransformer
+
+            loop = asyncio.get_running_loop()
+            self.model = await loop.run_in_executor(self._executor, SentenceTransformer, self.model_name)
+            logger.info(f"Loaded local embedding model {self.model_name}")
+        self._queue = asyncio.Queue()
+        self._held = None
+        self._worker = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        pending = [self._held] if self._held else []
+        while self._queue and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Local embedding server stopped"))
+        self._held = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @property
+    def embedding_dim(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def embedding_func(self) -> EmbeddingFunc:
+        return EmbeddingFunc(
+            embedding_dim=self.embedding_dim,
+            max_token_size=getattr(self.model, "max_seq_length", 512),
+            func=self.embed,
+            concurrent_limit=0,
+        )
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if self._worker is None:
+            raise RuntimeError("Local embedding server is not started")
+        future = asyncio.get_running_loop().create_future()
+        with observe_stage(current_pipeline(), "embedding", model=self.model_name, texts=len(texts)):
+            await self._queue.put((texts, future))
+            return await future
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, batch_size=self.max_batch_size, convert_to_numpy=True))
+
+    async def _next_batch(self) -> List[Tuple[List[str], asyncio.Future]]:
+        """
+        Requests totalling at most max_batch_size texts. A request that would overflow the batch
+        starts the next one; a single request larger than the limit is encoded on its own.
+        """
+        first, self._held = self._held or await self._queue.get(), None
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if size + len(item[0]) > self.max_batch_size:
+                self._held = item
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [(texts, future) for texts, future in await self._next_batch() if not future.cancelled()]
+            if not batch:
+                continue
+            all_texts = [text for texts, _ in batch for text in texts]
+            started = time.perf_counter()
+            try:
+                vectors = await loop.run_in_executor(self._executor, self._encode, all_texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.busy_seconds += time.perf_counter() - started
+            self.requests += len(batch)
+            self.batches += 1
+            self.texts += len(all_texts)
+
+            offset = 0
+            for texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(texts)])
+                offset += len(texts)
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "texts_per_second": round(self.texts / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+        }
@@ -0,0 +1,178 @@
+import asyncio
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Tuple
+
+from fastapi import Request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+
+from ..utils.logger import logger
+from ..utils.tracing import span
+
+# Seconds; spans the range from cache lookups to whole-file ingestion
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Each worker refreshes its own queue and in-flight gauges this often, so a multi-worker
+# scrape sums current values rather than one fresh value and the others' stale ones
+METRICS_SAMPLE_SECONDS = float(os.environ.get("METRICS_SAMPLE_SECONDS", 5))
+
+STAGE_SECONDS = Histogram(
+    "graphrag_stage_seconds",
+    "Time spent in each stage of the ingest and query pipelines",
+    ["pipeline", "stage"],
+    buckets=BUCKETS,
+)
+STORAGE_SECONDS = Histogram(
+    "graphrag_storage_seconds",
+    "Time spent in each storage method",
+    ["backend", "method"],
+    buckets=BUCKETS,
+)
+STORAGE_ERRORS = Counter(
+    "graphrag_storage_errors_total",
+    "Storage method calls that raised",
+    ["backend", "method"],
+)
+ANSWER_CACHE_LOOKUPS = Counter(
+    "graphrag_answer_cache_lookups_total",
+    "Answer cache lookups by result",
+    ["result"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "graphrag_http_request_seconds",
+    "Time until response headers are sent, by route and status",
+    ["method", "route", "status"],
+    buckets=BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "graphrag_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+QUEUE_DEPTH = Gauge(
+    "graphrag_queue_depth",
+    "Work waiting in each internal queue, sampled periodically in every worker",
+    ["queue"],
+    multiprocess_mode="livesum",
+)
+IN_FLIGHT = Gauge(
+    "graphrag_in_flight",
+    "Work currently running, sampled periodically in every worker",
+    ["kind"],
+    multiprocess_mode="livesum",
+)
+
+
+@contextmanager
+def observe_stage(pipeline: str, stage: str, **attributes):
+    """Time a pipeline stage into the stage histogram and, inside a traced request, a span"""
+    started = time.perf_counter()
+    try:
+        with span(f"{pipeline}.{stage}", **attributes) as current:
+            yield current
+    finally:
+        STAGE_SECONDS.labels(pipeline, stage).observe(time.perf_counter() - started)
+
+
+def record_stage(pipeline: str, stage: str, seconds: float):
+    """Record a stage timed by hand, for stages interleaved with other work such as streaming to a client"""
+    STAGE_SECONDS.labels(pipeline, stage).observe(seconds)
+
+
+def instrument_storage(backend: str):
+    """Class decorator timing and tracing every public async method of a storage class, inherited ones included"""
+    def decorate(cls):
+        for name, method in inspect.getmembers(cls, inspect.iscoroutinefunction):
+            if name.startswith("_"):
+                continue
+            setattr(cls, name, _timed(backend, name, method))
+        return cls
+
+    return decorate
+
+
+def _timed(backend: str, name: str, method):
+    histogram = STORAGE_SECONDS.labels(backend, name)
+    errors = STORAGE_ERRORS.labels(backend, name)
+    span_name = f"{backend}.{name}"
+
+    @wraps(method)
+    async def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with span(span_name):
+                return await method(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return timed
+
+
+async def metrics_middleware(request: Request, call_next):
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # Label by route template, not raw path, so /upload/{job_id} stays one series
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(request.method, getattr(route, "path", "unmatched"), str(status)).observe(
+            time.perf_counter() - started
+        )
+
+
+def sample_service(service) -> None:
+    """Copy queue depths and in-flight counts from the service into gauges"""
+    scheduler_stats = service.scheduler.stats().values()
+    queued = {"llm_interactive": 0, "llm_bulk": 0}
+    for stats in scheduler_stats:
+        queued["llm_interactive"] += stats["queued"]["interactive"]
+        queued["llm_bulk"] += stats["queued"]["bulk"]
+    queued["upload_jobs"] = sum(1 for job in service.jobs.values() if job.status == "queued")
+    if service.embedding_server:
+        queued["local_embedding"] = service.embedding_server.stats()["queue_depth"]
+    for queue, depth in queued.items():
+        QUEUE_DEPTH.labels(queue).set(depth)
+
+    IN_FLIGHT.labels("queries").set(service.in_flight_queries.in_flight)
+    IN_FLIGHT.labels("upload_jobs").set(sum(1 for job in service.jobs.values() if job.status == "running"))
+    IN_FLIGHT.labels("llm_calls").set(sum(stats["active"] for stats in scheduler_stats))
+    IN_FLIGHT.labels("projects").set(len(service.projects.stats()))
+
+
+async def sample_periodically(service, interval: float = METRICS_SAMPLE_SECONDS) -> None:
+    """Run sample_service every interval seconds until cancelled"""
+    while True:
+        try:
+            sample_service(service)
+        except Exception as e:
+            logger.warning(f"Failed to sample service metrics: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+def mark_process_dead() -> None:
+    """Remove this worker's live gauge values from the multiprocess directory; call on shutdown"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus text exposition; aggregates all workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,95 @@
+import re
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict
+
+from lightrag.prompt import PROMPTS
+
+# Phrases that ask for a corpus-wide view, which needs LightRAG's relationship (global) pass.
+# Words like "main" or "common" only count next to themes, trends and the like: on their own
+# they also open ordinary entity questions ("the main side effect of temozolomide")
+GLOBAL_CUES = re.compile(
+    r"\b(overall|overview|summari[sz]e|summary|landscape|broadly|in general|compare|comparison|contrast"
+    r"|across (?:the|all|these|this|every)\b[\w ]*?(?:corpus|papers|documents|studies|literature)"
+    r"|(?:main|major|common|key|recurring|general) (?:themes?|trends?|topics?|findings|patterns|ideas)"
+    r"|themes|trends)\b",
+    re.IGNORECASE,
+)
+DEFINITION_PATTERN = re.compile(r"^(what|who|where|when|which)\s+(is|are|was|were)\b|^(define|describe)\b", re.IGNORECASE)
+QUESTION_WORDS = {"what", "who", "where", "when", "which", "why", "how", "is", "are", "does", "do", "can"}
+WORD_PATTERN = re.compile(r"[A-Za-z0-9][\w\-']*")
+LATENCY_WINDOW = 1000
+
+
+@dataclass
+class RouteDecision:
+    mode: str
+    reason: str
+
+
+class _ModeStats:
+    def __init__(self):
+        self.count = 0
+        self.routed = 0
+        self.failed = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class QueryModeRouter:
+    """
+    Picks the cheapest LightRAG mode that should answer a query, using word and phrase heuristics:
+    naive for keyword lookups, local for questions about specific entities, global for
+    corpus-wide questions, and hybrid only when a query needs both. Per-mode latency and
+    fail-response rates are kept so the heuristics can be tuned from /search/modes.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, _ModeStats] = defaultdict(_ModeStats)
+
+    def route(self, query: str) -> RouteDecision:
+        text = query.strip()
+        words = WORD_PATTERN.findall(text)
+        lowered = [word.lower() for word in words]
+
+        if '"' in text or (len(words) <= 3 and not QUESTION_WORDS.intersection(lowered)):
+            return RouteDecision("naive", "keyword lookup")
+
+        global_cues = {match.group(0).lower() for match in GLOBAL_CUES.finditer(text)}
+        entities = [word for word in words[1:] if word[0].isupper() or word.isupper() or any(c.isdigit() for c in word)]
+
+        if global_cues and entities:
+            return RouteDecision("hybrid", f"entities {entities[:3]} with corpus-wide cues {sorted(global_cues)[:3]}")
+        if global_cues:
+            return RouteDecision("global", f"corpus-wide cues {sorted(global_cues)[:3]}")
+        if entities:
+            return RouteDecision("local", f"entity question {entities[:3]}")
+        if DEFINITION_PATTERN.search(text):
+            return RouteDecision("local", "definition question")
+        if len(words) > 20:
+            return RouteDecision("hybrid", "long open-ended question")
+        return RouteDecision("local", "short question")
+
+    def record(self, mode: str, seconds: float, result, routed: bool = False) -> None:
+        stats = self._stats[mode]
+        stats.count += 1
+        stats.routed += int(routed)
+        stats.failed += int(not result or result == PROMPTS["fail_response"])
+        stats.latencies.append(seconds)
+
+    def report(self) -> Dict[str, dict]:
+        report = {}
+        for mode, stats in self._stats.items():
+            latencies = list(stats.latencies)
+            report[mode] = {
+                "queries": stats.count,
+                "auto_routed": stats.routed,
+                "fail_rate": round(stats.failed / stats.count, 3) if stats.count else 0.0,
+                "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+                "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+            }
+        return report
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from fastapi import UploadFile
 
@@ -7,9 +7,17 @@ class UploadFiles(BaseModel):
     context: Optional[str] = None
     response: Optional[str] = None
 
-class Search(BaseModel):
+class RetrievalOptions(BaseModel):
+    top_k: Optional[int] = Field(None, ge=1, le=200)  # Entities (local) or relationships (global) to retrieve
+    max_token_for_text_unit: Optional[int] = Field(None, ge=100, le=32000)
+    max_token_for_global_context: Optional[int] = Field(None, ge=100, le=32000)
+    max_token_for_local_context: Optional[int] = Field(None, ge=100, le=32000)
+    only_need_context: bool = False  # Return the retrieved context and skip generation
+    latency_budget_ms: Optional[int] = Field(None, ge=100)  # Trim retrieval to fit this budget; enforced as a deadline
+
+class Search(RetrievalOptions):
     text: str
-    method: Optional[str] = "hybrid"  # Can be "hybrid", "global", "local", or "naive"
+    method: Optional[str] = "hybrid"  # Can be "hybrid", "global", "local", "naive" or "auto"
     community_level: Optional[int] = 2  # Kept for backward compatibility
     response_type: Optional[str] = "Multiple Paragraphs"  # Kept for backward compatibility
 
@@ -18,4 +26,12 @@ class PutBlobResult(BaseModel):
     download_urls: list[str]
     pathnames: list[str]
     content_types: list[str | None] = None
-    content_dispositions: list[str]
\ No newline at end of file
+    content_dispositions: list[str]
+
+class UploadJob(BaseModel):
+    job_id: str
+    filename: str
+    status: str = "queued"  # Can be "queued", "running", "done" or "failed"
+    sections: int = 0
+    error: Optional[str] = None
+    project: Optional[str] = None
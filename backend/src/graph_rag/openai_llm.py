@@ -0,0 +1,69 @@
+from typing import List
+
+import numpy as np
+from lightrag.llm import GPTKeywordExtractionFormat
+from lightrag.utils import EmbeddingFunc, safe_unicode_decode
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+LLM_MODEL = "gpt-4o-mini"
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Connection errors are retried here. 429s are not: the SDK's own retries are off so that rate
+# limits reach the scheduler at once, which retries them through its queue instead of in a slot
+_retry_connection_errors = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    retry=retry_if_exception_type((APIConnectionError, APITimeoutError)),
+)
+_client = None
+
+
+def openai_client() -> AsyncOpenAI:
+    """Process-wide client, created on first use so each worker builds its own after the fork"""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(max_retries=0)
+    return _client
+
+
+def _decode(content: str) -> str:
+    return safe_unicode_decode(content.encode("utf-8")) if r"\u" in content else content
+
+
+@_retry_connection_errors
+async def openai_complete(prompt, system_prompt=None, history_messages=[], keyword_extraction=False, **kwargs):
+    """Drop-in for LightRAG's gpt_4o_mini_complete; returns an async iterator of text when stream=True"""
+    kwargs.pop("hashing_kv", None)
+    if keyword_extraction:
+        kwargs["response_format"] = GPTKeywordExtractionFormat
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.extend(history_messages)
+    messages.append({"role": "user", "content": prompt})
+
+    client = openai_client()
+    if "response_format" in kwargs:
+        response = await client.beta.chat.completions.parse(model=LLM_MODEL, messages=messages, **kwargs)
+    else:
+        response = await client.chat.completions.create(model=LLM_MODEL, messages=messages, **kwargs)
+
+    if hasattr(response, "__aiter__"):
+        async def inner():
+            async for chunk in response:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    yield _decode(content)
+
+        return inner()
+    return _decode(response.choices[0].message.content)
+
+
+@_retry_connection_errors
+async def _embed(texts: List[str]) -> np.ndarray:
+    response = await openai_client().embeddings.create(model=EMBEDDING_MODEL, input=texts, encoding_format="float")
+    return np.array([item.embedding for item in response.data])
+
+
+openai_embedding_func = EmbeddingFunc(embedding_dim=1536, max_token_size=8192, func=_embed)
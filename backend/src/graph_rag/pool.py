@@ -0,0 +1,25 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def pool_size() -> int:
+    """Number of worker processes used for CPU-bound document work"""
+    return int(os.environ.get("GRAPH_RAG_WORKERS", os.cpu_count() or 1))
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared process pool for parsing and tokenization, created on first use"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=pool_size())
+    return _process_pool
+
+
+def shutdown_process_pool(wait: bool = True) -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait, cancel_futures=True)
+        _process_pool = None
@@ -0,0 +1,54 @@
+from dataclasses import asdict
+from typing import Optional
+
+from lightrag import QueryParam
+
+from .models import RetrievalOptions
+
+# Budget at which LightRAG's default retrieval settings fit comfortably
+REFERENCE_BUDGET_MS = 20000
+MIN_BUDGET_SCALE = 0.1
+MIN_TOP_K = 5
+MIN_CONTEXT_TOKENS = 500
+# Below this budget global/hybrid graph expansion is skipped in favour of local retrieval
+GRAPH_EXPANSION_MIN_BUDGET_MS = 3000
+
+
+def apply_latency_budget(param: QueryParam, budget_ms: int) -> QueryParam:
+    """
+    Scale top_k and the context token budgets down in proportion to the latency budget, so the
+    query is more likely to finish in time. The budget itself is enforced by the service.
+    """
+    scale = min(1.0, max(MIN_BUDGET_SCALE, budget_ms / REFERENCE_BUDGET_MS))
+    param.top_k = max(min(param.top_k, MIN_TOP_K), int(param.top_k * scale))
+    for field in ("max_token_for_text_unit", "max_token_for_global_context", "max_token_for_local_context"):
+        tokens = getattr(param, field)
+        setattr(param, field, max(min(tokens, MIN_CONTEXT_TOKENS), int(tokens * scale)))
+    if budget_ms < GRAPH_EXPANSION_MIN_BUDGET_MS and param.mode in ("global", "hybrid"):
+        param.mode = "local"
+    return param
+
+
+def build_query_param(mode: str, response_type: str, options: Optional[RetrievalOptions] = None) -> QueryParam:
+    """Turn per-request retrieval options into a LightRAG QueryParam"""
+    options = options or RetrievalOptions()
+    param = QueryParam(mode=mode, response_type=response_type, only_need_context=options.only_need_context)
+    for field in ("top_k", "max_token_for_text_unit", "max_token_for_global_context", "max_token_for_local_context"):
+        value = getattr(options, field)
+        if value is not None:
+            setattr(param, field, value)
+    if options.latency_budget_ms is not None:
+        apply_latency_budget(param, options.latency_budget_ms)
+    return param
+
+
+def latency_budget_seconds(options: Optional[RetrievalOptions]) -> Optional[float]:
+    """Deadline for the query in seconds, or None without a budget"""
+    if options is None or options.latency_budget_ms is None:
+        return None
+    return options.latency_budget_ms / 1000
+
+
+def query_param_key(param: QueryParam) -> dict:
+    """Fields of a QueryParam that change the answer, for cache and coalescing keys"""
+    return {k: v for k, v in asdict(param).items() if k not in ("mode", "stream")}
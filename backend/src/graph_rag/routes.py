@@ -1,34 +1,182 @@
-from fastapi import APIRouter
-from .models import PutBlobResult, Search
+import asyncio
+import json
+import time
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from .dependencies import get_graph_rag_service
+from .metrics import render_metrics, sample_service
+from .models import PutBlobResult, RetrievalOptions, Search
+from .services import GraphRAGService
+from ..utils.tracing import current_trace_tree
 
 router = APIRouter()
+# How often a streaming response polls for a disconnected client
+DISCONNECT_CHECK_SECONDS = 0.5
 
 @router.get("/")
 async def root():
     return {"message": "LightRAG API", "status": "running"}
 
+@router.get("/ready")
+async def ready_api(graph_rag_service: GraphRAGService = Depends(get_graph_rag_service)):
+    """Readiness probe: 503 until warm-up has finished and again once shutdown starts draining"""
+    if not graph_rag_service.ready:
+        raise HTTPException(status_code=503, detail="Not ready")
+    return {"status": "ready"}
+
 @router.post("/create_graph/")
-async def upload_files_api(data: PutBlobResult):
+async def upload_files_api(data: PutBlobResult, project: Optional[str] = None, debug: bool = False, graph_rag_service: GraphRAGService = Depends(get_graph_rag_service)):
     """
     Process and index files using LightRAG.
+    Pass project to index into that project's isolated graph instead of the default one,
+    and debug=true to get the request's span tree back under "trace".
     """
-    from main import graph_rag_service  # Import the global instance
     print(data)
-    return await graph_rag_service.create_graph(data)
+    result = await graph_rag_service.create_graph(data, project)
+    if debug:
+        result["trace"] = current_trace_tree()
+    return result
+
+@router.post("/upload")
+async def upload_api(files: List[UploadFile] = File(...), project: Optional[str] = None, graph_rag_service: GraphRAGService = Depends(get_graph_rag_service)):
+    """
+    Upload files directly and index them in the background.
+    Returns one job id per file; poll /upload/{job_id} for progress.
+    """
+    return {"jobs": await graph_rag_service.upload_files(files, project)}
+
+@router.get("/upload/{job_id}")
+async def upload_status_api(job_id: str, graph_rag_service: GraphRAGService = Depends(get_graph_rag_service)):
+    return graph_rag_service.get_job(job_id)
 
 @router.get("/search")
-async def search_api(q: str):
+async def search_api(
+    q: str,
+    response: Response,
+    method: str = "hybrid",
+    response_type: str = "Multiple Paragraphs",
+    project: Optional[str] = None,
+    debug: bool = False,
+    options: RetrievalOptions = Depends(),
+    graph_rag_service: GraphRAGService = Depends(get_graph_rag_service),
+):
     """
     Endpoint for performing semantic search using LightRAG.
     Query params:
     - q: search query text
-    - method: search method (default: "hybrid")
-    - community_level: community level (default: 1)
-    - response_type: response type (default: "text")
+    - method: search method, one of "hybrid", "global", "local", "naive" or "auto" to let the
+      service pick the cheapest adequate mode (default: "hybrid")
+    - response_type: response type (default: "Multiple Paragraphs")
+    - project: search this project's graph instead of the default one
+    - top_k: entities (local) or relationships (global) to retrieve (default: 60)
+    - max_token_for_text_unit / max_token_for_global_context / max_token_for_local_context:
+      token budgets for each part of the context (default: 4000 each)
+    - only_need_context: return the retrieved context without generating an answer
+    - latency_budget_ms: trim graph expansion and context size to fit this budget, and answer
+      504 if the query still takes longer
+    - debug: include the request's span tree (storage, LLM and embedding calls) under "trace"
+    The X-Cache response header is HIT when the answer came from the answer cache.
     """
-    from main import graph_rag_service  # Import the global instance
+    result, cache_status = await graph_rag_service.run_query_with_status(
+        query=q,
+        method=method,
+        response_type=response_type,
+        options=options,
+        project=project,
+    )
+    response.headers["X-Cache"] = cache_status
+    if debug:
+        return {"result": result, "trace": current_trace_tree()}
     return {
-        "result": await graph_rag_service.run_query(
-            query=q,
-        )
-    } 
\ No newline at end of file
+        "result": result
+    }
+
+@router.get("/search/modes")
+async def search_modes_api(graph_rag_service: GraphRAGService = Depends(get_graph_rag_service)):
+    """Per-mode query counts, latency percentiles and fail-response rates, for tuning "auto" routing"""
+    return graph_rag_service.mode_router.report()
+
+@router.get("/projects")
+async def projects_api(graph_rag_service: GraphRAGService = Depends(get_graph_rag_service)):
+    """Project LightRAG instances currently held in memory, with their in-use count and idle time"""
+    return graph_rag_service.projects.stats()
+
+@router.get("/metrics")
+async def metrics_api(graph_rag_service: GraphRAGService = Depends(get_graph_rag_service)):
+    """Prometheus metrics: per-stage and per-storage-method latency, cache lookups, queue depths and in-flight work"""
+    sample_service(graph_rag_service)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@router.get("/scheduler")
+async def scheduler_stats_api(graph_rag_service: GraphRAGService = Depends(get_graph_rag_service)):
+    """Concurrency limits, active calls, queue depth per lane and 429 counts for each model"""
+    return graph_rag_service.scheduler.stats()
+
+@router.get("/embeddings")
+async def embedding_stats_api(graph_rag_service: GraphRAGService = Depends(get_graph_rag_service)):
+    """Batching and throughput stats for the local embedding model, when LOCAL_EMBEDDING_MODEL is set"""
+    if not graph_rag_service.embedding_server:
+        raise HTTPException(status_code=404, detail="Local embedding model is not enabled")
+    return graph_rag_service.embedding_server.stats()
+
+@router.get("/search/stream")
+async def search_stream_api(
+    q: str,
+    request: Request,
+    method: str = "hybrid",
+    response_type: str = "Multiple Paragraphs",
+    project: Optional[str] = None,
+    options: RetrievalOptions = Depends(),
+    graph_rag_service: GraphRAGService = Depends(get_graph_rag_service),
+):
+    """
+    Streaming variant of /search using Server-Sent Events; accepts the same query params.
+    Emits a "metadata" event after retrieval, "token" events as the answer is generated,
+    then "done" (or "error"). Generation stops when the client disconnects.
+    """
+
+    async def events():
+        stream = graph_rag_service.stream_query(query=q, method=method, response_type=response_type, options=options, project=project)
+        # The query runs in its own task, so a client that leaves during retrieval or a long gap
+        # between tokens is noticed within DISCONNECT_CHECK_SECONDS rather than at the next event
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+        async def produce():
+            try:
+                async for item in stream:
+                    await queue.put(item)
+            finally:
+                await stream.aclose()
+            await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        next_check = time.monotonic() + DISCONNECT_CHECK_SECONDS
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(0.0, next_check - time.monotonic()))
+                except asyncio.TimeoutError:
+                    if producer.done():
+                        # A query that ran to the end queued None first, so this only re-raises a failure
+                        producer.result()
+                        break
+                    if await request.is_disconnected():
+                        break
+                    next_check = time.monotonic() + DISCONNECT_CHECK_SECONDS
+                    continue
+                if item is None:
+                    break
+                event, data = item
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            # Cancelling the producer closes the query and its upstream LLM stream
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
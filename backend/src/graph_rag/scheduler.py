@@ -0,0 +1,304 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional
+
+from lightrag.utils import EmbeddingFunc
+
+from ..utils.logger import logger
+from .metrics import observe_stage
+
+INTERACTIVE = 0
+BULK = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Share of a model's concurrency that bulk work may occupy, so queries always find a free slot
+BULK_SHARE = float(os.environ.get("LLM_BULK_SHARE", 0.75))
+RATE_LIMIT_COOLDOWN = 2.0
+# Attempts per call when the provider answers 429; waits happen in the queue, not while holding a slot
+RATE_LIMIT_ATTEMPTS = int(os.environ.get("LLM_RATE_LIMIT_ATTEMPTS", 3))
+
+_priority: ContextVar[int] = ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(lane: int):
+    """Run LLM and embedding calls made inside this block (and tasks it creates) in the given lane"""
+    token = _priority.set(lane)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_pipeline() -> str:
+    """Metrics label for the work running in this context"""
+    return "ingest" if _priority.get() == BULK else "query"
+
+
+def estimate_tokens(*texts: Optional[str]) -> int:
+    return max(1, sum(len(text) for text in texts if text) // 4)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class ModelLimiter:
+    """Rate limits, adaptive concurrency and a priority queue for a single model"""
+
+    def __init__(self, model: str, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.active = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self._successes = 0
+        self._cooldown_until = 0.0
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, cost: int, lane: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (lane, next(self._seq), cost, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def finish(self, error: Optional[BaseException] = None):
+        """Give back a slot taken by acquire, adjusting concurrency by how the call ended"""
+        if error is None:
+            self.on_success()
+        elif isinstance(error, Exception) and is_rate_limited(error):
+            self.on_rate_limited()
+        self.release()
+
+    def on_success(self):
+        self.completed += 1
+        self._successes += 1
+        if self.limit < self.max_concurrency and self._successes >= self.limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_rate_limited(self):
+        self.rate_limited += 1
+        self._successes = 0
+        self.limit = max(1, self.limit // 2)
+        self._cooldown_until = time.monotonic() + RATE_LIMIT_COOLDOWN
+        logger.warning(f"{self.model} rate limited, concurrency lowered to {self.limit}")
+
+    def _dispatch(self):
+        while self._queue:
+            lane, _, cost, future = self._queue[0]
+            if future.cancelled():
+                heapq.heappop(self._queue)
+                continue
+            limit = self.limit if lane == INTERACTIVE else max(1, int(self.limit * BULK_SHARE))
+            if self.active >= limit:
+                return
+            wait = max(
+                self._cooldown_until - time.monotonic(),
+                self.requests.wait_time(1),
+                self.tokens.wait_time(cost),
+            )
+            if wait > 0:
+                self._schedule(wait)
+                return
+            heapq.heappop(self._queue)
+            self.requests.take(1)
+            self.tokens.take(cost)
+            self.active += 1
+            future.set_result(None)
+
+    def _schedule(self, delay: float):
+        """Dispatch again after delay, or sooner if an earlier wake-up is already armed"""
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._timer is not None and not self._timer.cancelled():
+            if self._timer.when() <= when:
+                return
+            # e.g. an interactive call that needs fewer tokens than the bulk call it overtook
+            self._timer.cancel()
+
+        def fire():
+            self._timer = None
+            self._dispatch()
+        self._timer = loop.call_at(when, fire)
+
+    def stats(self) -> dict:
+        queued = {name: 0 for name in LANE_NAMES.values()}
+        for lane, _, _, future in self._queue:
+            if not future.done():
+                queued[LANE_NAMES[lane]] += 1
+        return {
+            "concurrency_limit": self.limit,
+            "active": self.active,
+            "queued": queued,
+            "completed": self.completed,
+            "rate_limited": self.rate_limited,
+        }
+
+
+class HeldStream:
+    """Streamed LLM response that keeps its scheduler slot until it is consumed or closed"""
+
+    def __init__(self, stream, limiter: ModelLimiter):
+        self._stream = stream
+        self._limiter = limiter
+        self._finished = False
+
+    def _finish(self, error: Optional[BaseException] = None):
+        if not self._finished:
+            self._finished = True
+            self._limiter.finish(error)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._finish()
+            raise
+        except BaseException as e:
+            self._finish(e)
+            raise
+
+    async def aclose(self):
+        try:
+            if hasattr(self._stream, "aclose"):
+                await self._stream.aclose()
+        finally:
+            # Closed before the end, so neither a success nor a rate limit
+            self._finish(asyncio.CancelledError())
+
+
+class LLMScheduler:
+    """
+    Process-wide gate in front of the LLM and embedding functions handed to LightRAG.
+    Each model gets request and token buckets, a concurrency limit that halves on 429s and
+    creeps back up on success, and a queue where interactive calls go ahead of bulk ingestion.
+    """
+
+    def __init__(self):
+        self._limiters: Dict[str, ModelLimiter] = {}
+
+    def configure(self, model: str, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int):
+        self._limiters[model] = ModelLimiter(model, requests_per_minute, tokens_per_minute, max_concurrency)
+
+    def _limiter(self, model: str) -> ModelLimiter:
+        if model not in self._limiters:
+            self.configure(model, 5000, 2_000_000, 16)
+        return self._limiters[model]
+
+    async def _call(self, model: str, cost: int, call):
+        """
+        Run call() in a slot, going back through the queue on 429s so the lowered concurrency and
+        cooldown apply to the retry. Streamed results hold the slot until they are consumed.
+        """
+        limiter = self._limiter(model)
+        for attempt in range(1, RATE_LIMIT_ATTEMPTS + 1):
+            await limiter.acquire(cost, _priority.get())
+            try:
+                result = await call()
+            except BaseException as e:
+                limiter.finish(e)
+                if isinstance(e, Exception) and is_rate_limited(e) and attempt < RATE_LIMIT_ATTEMPTS:
+                    continue
+                raise
+            if hasattr(result, "__aiter__"):
+                return HeldStream(result, limiter)
+            limiter.finish()
+            return result
+
+    def wrap_llm(self, func, model: str):
+        """
+        func should not retry rate limits itself: retries made while holding the slot hide the
+        429 from the adaptive limit, see openai_llm.py
+        """
+        @wraps(func)
+        async def scheduled(prompt, system_prompt=None, history_messages=[], **kwargs):
+            cost = estimate_tokens(prompt, system_prompt, *[m.get("content") for m in history_messages])
+
+            async def call():
+                with observe_stage(current_pipeline(), "llm", model=model, estimated_tokens=cost):
+                    return await func(prompt, system_prompt=system_prompt, history_messages=history_messages, **kwargs)
+
+            return await self._call(model, cost, call)
+
+        return scheduled
+
+    def wrap_embedding(self, embedding_func: EmbeddingFunc, model: str) -> EmbeddingFunc:
+        async def scheduled(texts: List[str]):
+            async def call():
+                with observe_stage(current_pipeline(), "embedding", model=model, texts=len(texts)):
+                    return await embedding_func(texts)
+
+            return await self._call(model, estimate_tokens(*texts), call)
+
+        return EmbeddingFunc(
+            embedding_dim=embedding_func.embedding_dim,
+            max_token_size=embedding_func.max_token_size,
+            func=scheduled,
+            concurrent_limit=0,
+        )
+
+    def stats(self) -> Dict[str, dict]:
+        return {model: limiter.stats() for model, limiter in self._limiters.items()}
+
+
+def scheduler_from_env(llm_model: str, embedding_model: str) -> LLMScheduler:
+    scheduler = LLMScheduler()
+    scheduler.configure(
+        llm_model,
+        float(os.environ.get("LLM_RPM", 5000)),
+        float(os.environ.get("LLM_TPM", 2_000_000)),
+        int(os.environ.get("LLM_MAX_CONCURRENCY", 16)),
+    )
+    scheduler.configure(
+        embedding_model,
+        float(os.environ.get("EMBEDDING_RPM", 5000)),
+        float(os.environ.get("EMBEDDING_TPM", 5_000_000)),
+        int(os.environ.get("EMBEDDING_MAX_CONCURRENCY", 16)),
+    )
+    return scheduler
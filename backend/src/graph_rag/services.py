@@ -1,18 +1,56 @@
 import os
 import shutil
+import sys
+import tempfile
+import uuid
 from pathlib import Path
-from fastapi import HTTPException
-from lightrag import LightRAG, QueryParam
-from lightrag.llm import gpt_4o_mini_complete
+from fastapi import HTTPException, UploadFile
+from lightrag import LightRAG
+from lightrag.prompt import PROMPTS
 from ..utils.logger import logger
+from ..utils.tracing import current_span, detached_context, export_trace, span, start_trace
 from .storage.custom_neo4j import CustomNeo4JStorage
 from .storage.custom_pinecone import PineconeVectorDBStorage
+from .storage.custom_mongo import ProjectMongoKVStorage
+from .storage.memory_graph import CSRGraphStorage
+from .storage.connections import close_connections, get_mongo_client, get_neo4j_driver
 from lightrag.lightrag import LightRAG
-from .models import PutBlobResult
+from .models import PutBlobResult, RetrievalOptions, UploadJob
+from .extraction import detect_kind, download_to_disk, iter_sections
+from .chunking import ainsert_prechunked
+from .pool import get_process_pool, pool_size, shutdown_process_pool
+from .cache import AnswerCache, normalize_query
+from .singleflight import SingleFlight
+from .query_params import build_query_param, latency_budget_seconds, query_param_key
+from .mode_router import QueryModeRouter
+from .scheduler import BULK, llm_priority, scheduler_from_env
+from .local_embedding import LocalEmbeddingServer
+from .openai_llm import EMBEDDING_MODEL, LLM_MODEL, openai_complete, openai_embedding_func
+from .metrics import ANSWER_CACHE_LOOKUPS, observe_stage, record_stage, sample_periodically
+from .tenancy import ProjectPool, flush_rag, validate_project
 import httpx
 import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential
-from typing import List
+import json
+import time
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_JOB_CONCURRENCY = int(os.environ.get("UPLOAD_JOB_CONCURRENCY", 2))
+MAX_TRACKED_JOBS = 1000
+# LightRAG's own limiter (limit_async_func_call) never frees a slot when a call raises or is
+# cancelled, so a few hundred timeouts would stall an instance for good. Keep it out of the way;
+# the scheduler does the throttling
+LIGHTRAG_MAX_ASYNC = sys.maxsize
+SHUTDOWN_DRAIN_SECONDS = float(os.environ.get("SHUTDOWN_DRAIN_SECONDS", 30))
+DEFAULT_STORAGE = {
+    # CSRGraphStorage keeps the graph in process memory instead of Neo4j, see README
+    "graph_storage": os.environ.get("GRAPH_STORAGE", "CustomNeo4JStorage"),
+    "vector_storage": "CustomPineconeVectorDBStorage",
+    "kv_storage": "CustomMongoKVStorage",
+}
 
 # Patch the storage class registry
 def setup_custom_storage():
@@ -23,6 +61,8 @@ def setup_custom_storage():
     original_storage_classes.update({
         "CustomNeo4JStorage": CustomNeo4JStorage,
         "CustomPineconeVectorDBStorage": PineconeVectorDBStorage,
+        "CustomMongoKVStorage": ProjectMongoKVStorage,
+        "CSRGraphStorage": CSRGraphStorage,
     })
 
     print(original_storage_classes)
@@ -34,13 +74,45 @@ def setup_custom_storage():
     LightRAG._get_storage_class = new_get_storage_class
     return original_storage_classes
 
+def register_storage(name: str, storage_class: type):
+    """Make a storage class available to LightRAG under the given name"""
+    LightRAG._get_storage_class(None)[name] = storage_class
+
+def resolve_mode(method: str) -> str:
+    return {
+        "global": "global",
+        "local": "local",
+        "hybrid": "hybrid",
+        "naive": "naive"
+    }.get(method, "hybrid")
+
 class GraphRAGService:
-    def __init__(self, base_path: str = "./data", working_dir: str = "./local_neo4jWorkDir"):
+    def __init__(self, base_path: str = "./data", working_dir: str = "./local_neo4jWorkDir", storage: Optional[Dict[str, str]] = None, llm_model_func=None, embedding_func=None):
+        """
+        storage overrides entries of DEFAULT_STORAGE by LightRAG argument name; llm_model_func and
+        embedding_func replace the OpenAI functions. Both are meant for benchmarks and local runs.
+        """
         self.base_path = base_path
         self.input_path = f"{base_path}/input"
         self.output_path = f"{base_path}/output"
         self.rag = None
         self.working_dir = working_dir
+        self.jobs: Dict[str, UploadJob] = {}
+        self._job_tasks: Dict[str, asyncio.Task] = {}
+        self._job_semaphore = asyncio.Semaphore(UPLOAD_JOB_CONCURRENCY)
+        self.answer_cache = AnswerCache.from_env()
+        self.in_flight_queries = SingleFlight()
+        self.mode_router = QueryModeRouter()
+        self.scheduler = scheduler_from_env(LLM_MODEL, EMBEDDING_MODEL)
+        self.embedding_server = LocalEmbeddingServer.from_env()
+        self.projects = ProjectPool(self._create_project_rag)
+        self.storage = {**DEFAULT_STORAGE, **(storage or {})}
+        self.llm_model_func = llm_model_func or openai_complete
+        self.embedding_func = embedding_func or openai_embedding_func
+        self._llm_func = None
+        self._embedding_func = None
+        self.ready = False
+        self._metrics_sampler: Optional[asyncio.Task] = None
 
     setup_custom_storage()
     
@@ -49,20 +121,21 @@ class GraphRAGService:
         try:
             # Create directories with explicit permissions
             os.makedirs(self.working_dir, mode=0o777, exist_ok=True)
+            os.makedirs(self.input_path, exist_ok=True)
             
             logger.info(f"Created directories: {self.input_path}, {self.output_path}, {self.working_dir}")
 
             # NEO4J_AUTH = os.environ.get('NEO4J_AUTH')
             # NEO4J_USERNAME, NEO4J_PASSWORD = NEO4J_AUTH.split('/')
             
-            # Initialize LightRAG with correct parameters
-            self.rag = LightRAG(
-                working_dir=self.working_dir,
-                graph_storage="CustomNeo4JStorage",
-                log_level="DEBUG",
-                vector_storage="CustomPineconeVectorDBStorage",
-                kv_storage="MongoKVStorage",
-            )   
+            if self.embedding_server:
+                await self.embedding_server.start()
+                self._embedding_func = self.embedding_server.embedding_func()
+            else:
+                self._embedding_func = self.scheduler.wrap_embedding(self.embedding_func, EMBEDDING_MODEL)
+            self._llm_func = self.scheduler.wrap_llm(self.llm_model_func, LLM_MODEL)
+
+            self.rag = self._build_rag(self.working_dir)
             logger.info("LightRAG initialized successfully")
             
         except Exception as e:
@@ -74,95 +147,317 @@ class GraphRAGService:
                 detail=f"Failed to initialize: {str(e)}"
             )
 
-    async def run_query(self, query: str, method: str = "hybrid", community_level: int = 2, response_type: str = "Multiple Paragraphs"):
+    async def warm_up(self):
+        """Open database connections, index handles, the embedding model and worker processes before taking traffic"""
+        loop = asyncio.get_running_loop()
+        if self.storage["graph_storage"] == "CustomNeo4JStorage":
+            await loop.run_in_executor(None, get_neo4j_driver().verify_connectivity)
+        await loop.run_in_executor(None, get_mongo_client().admin.command, "ping")
+        for storage in (self.rag.entities_vdb, self.rag.relationships_vdb, self.rag.chunks_vdb):
+            index = getattr(storage, "_index", None)
+            if index is not None:
+                await loop.run_in_executor(None, index.describe_index_stats)
+        if self.embedding_server:
+            await self.embedding_server.embed(["warm up"])
+        # Fork the worker processes now rather than on the first upload
+        pool = get_process_pool()
+        await asyncio.gather(*[loop.run_in_executor(pool, os.getpid) for _ in range(pool_size())])
+        logger.info("Warm-up finished")
+
+    async def start(self):
+        await self.setup_directories()
+        await self.warm_up()
+        self._metrics_sampler = asyncio.create_task(sample_periodically(self), context=detached_context())
+        self.ready = True
+
+    async def drain(self, timeout: float = SHUTDOWN_DRAIN_SECONDS):
+        """Stop reporting ready and give running upload jobs up to timeout seconds to finish"""
+        self.ready = False
+        tasks = list(self._job_tasks.values())
+        if not tasks:
+            return
+        logger.info(f"Waiting up to {timeout}s for {len(tasks)} upload jobs")
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for job in self.jobs.values():
+            if job.status in ("queued", "running"):
+                job.status = "failed"
+                job.error = "Interrupted by shutdown"
+
+    async def close(self):
+        """Release everything the service holds: embedding worker, process pool and database clients"""
+        if self._metrics_sampler:
+            self._metrics_sampler.cancel()
+        await self.projects.close()
+        if self.rag:
+            try:
+                await flush_rag(self.rag)
+            except Exception as e:
+                logger.error(f"Failed to flush LightRAG instance: {str(e)}")
+        if self.embedding_server:
+            await self.embedding_server.stop()
+        await asyncio.get_running_loop().run_in_executor(None, shutdown_process_pool)
+        await self.answer_cache.close()
+        close_connections()
+        logger.info("GraphRAG service closed")
+
+    def _build_rag(self, working_dir: str, project: Optional[str] = None) -> LightRAG:
+        """Create a LightRAG instance; a project gets its own Neo4j label, Pinecone namespace and Mongo collections"""
+        return LightRAG(
+            working_dir=working_dir,
+            log_level="DEBUG",
+            **self.storage,
+            llm_model_func=self._llm_func,
+            llm_model_max_async=LIGHTRAG_MAX_ASYNC,
+            embedding_func=self._embedding_func,
+            embedding_func_max_async=LIGHTRAG_MAX_ASYNC,
+            addon_params={"project": project} if project else {},
+        )
+
+    async def _create_project_rag(self, project: str) -> LightRAG:
+        working_dir = f"{self.working_dir}/projects/{project}"
+        os.makedirs(working_dir, exist_ok=True)
+        return self._build_rag(working_dir, project)
+
+    @asynccontextmanager
+    async def _rag_for(self, project: Optional[str]):
+        """Yield the LightRAG instance serving a project, or the default instance when project is None"""
+        if not self.rag:
+            raise HTTPException(status_code=500, detail="LightRAG not initialized")
+        if project is None:
+            yield self.rag
+            return
+        async with self.projects.acquire(validate_project(project)) as rag:
+            yield rag
+
+    def _select_mode(self, query: str, method: str) -> str:
+        """Resolve the requested method, routing "auto" to the cheapest adequate mode"""
+        if method != "auto":
+            return resolve_mode(method)
+        decision = self.mode_router.route(query)
+        logger.info(f"Routed query to {decision.mode} mode ({decision.reason}): {query[:80]}")
+        return decision.mode
+
+    async def run_query(self, query: str, method: str = "hybrid", community_level: int = 2, response_type: str = "Multiple Paragraphs", options: Optional[RetrievalOptions] = None, project: Optional[str] = None):
         """Run a LightRAG query"""
+        result, _ = await self.run_query_with_status(query, method, community_level, response_type, options, project)
+        return result
+
+    async def run_query_with_status(self, query: str, method: str = "hybrid", community_level: int = 2, response_type: str = "Multiple Paragraphs", options: Optional[RetrievalOptions] = None, project: Optional[str] = None) -> Tuple[str, str]:
+        """Run a LightRAG query through the answer cache. Returns the result and "HIT" or "MISS"."""
+        deadline = asyncio.timeout(latency_budget_seconds(options))
         try:
-            if not self.rag:
-                raise HTTPException(status_code=500, detail="LightRAG not initialized")
-                
-            mode = {
-                "global": "global",
-                "local": "local",
-                "hybrid": "hybrid",
-                "naive": "naive"
-            }.get(method, "hybrid")
-            
-            result = await self.rag.aquery(
-                query,
-                param=QueryParam(
-                    mode=mode,
-                )
-            )
+            routed = method == "auto"
+            param = build_query_param(self._select_mode(query, method), response_type, options)
+            mode = param.mode
+            params = query_param_key(param)
+            scope = project or "default"
+
+            async with deadline, self._rag_for(project) as rag:
+                with observe_stage("query", "cache_lookup"):
+                    # Read once, so an answer racing an ingest is stored under the version it was computed for
+                    version = await self.answer_cache.corpus_version(scope)
+                    cached = await self.answer_cache.get(query, mode, params, scope, version)
+                ANSWER_CACHE_LOOKUPS.labels("miss" if cached is None else "hit").inc()
+                if cached is not None:
+                    return cached, "HIT"
+
+                async def execute():
+                    # Shared by every caller, so it is traced on its own rather than under one request
+                    with start_trace("query.shared", mode=mode, project=scope) as root:
+                        started = time.perf_counter()
+                        with observe_stage("query", f"aquery_{mode}"):
+                            result = await rag.aquery(
+                                query,
+                                param=param
+                            )
+                        self.mode_router.record(mode, time.perf_counter() - started, result, routed)
+                        if isinstance(result, str) and result != PROMPTS["fail_response"]:
+                            await self.answer_cache.set(query, mode, params, result, scope, version)
+                    await export_trace(root)
+                    return result, root
+
+                # Identical concurrent queries share one aquery execution
+                key = json.dumps([scope, normalize_query(query), mode, params], sort_keys=True)
+                result, shared_trace = await self.in_flight_queries.do(key, execute)
+                request_span = current_span()
+                if request_span is not None:
+                    request_span.link(shared_trace)
                 
-            return result
+            return result, "MISS"
             
+        except HTTPException:
+            raise
         except Exception as e:
+            if isinstance(e, TimeoutError) and deadline.expired():
+                raise HTTPException(status_code=504, detail=f"Query exceeded its latency budget of {options.latency_budget_ms} ms")
             logger.error(f"Error running query: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to execute query: {str(e)}")
 
-    async def create_graph(self, data: PutBlobResult):
+    async def stream_query(self, query: str, method: str = "hybrid", response_type: str = "Multiple Paragraphs", options: Optional[RetrievalOptions] = None, project: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run a LightRAG query as a stream of (event, data) pairs: "metadata" once retrieval
+        is done, then "token" for each piece of the generated answer, then "done".
+        A latency budget covers retrieval and the start of generation, not the whole stream.
+        Closing the generator early (client disconnect) closes the upstream LLM stream.
+        """
+        budget = latency_budget_seconds(options)
+        # asyncio.timeout cannot span the yields, so the deadline is applied to each upstream await
+        deadline = asyncio.get_running_loop().time() + budget if budget is not None else None
+        try:
+            param = build_query_param(self._select_mode(query, method), response_type, options)
+            mode = param.mode
+            params = query_param_key(param)
+            scope = project or "default"
+
+            async with self._rag_for(project) as rag:
+                with observe_stage("query", "cache_lookup"):
+                    # Read once, so an answer racing an ingest is stored under the version it was computed for
+                    version = await self.answer_cache.corpus_version(scope)
+                    cached = await self.answer_cache.get(query, mode, params, scope, version)
+                ANSWER_CACHE_LOOKUPS.labels("miss" if cached is None else "hit").inc()
+                if cached is not None:
+                    yield "metadata", {"mode": mode, "cache": "HIT"}
+                    yield "token", cached
+                    yield "done", {}
+                    return
+
+                started = time.perf_counter()
+                with observe_stage("query", f"retrieval_{mode}"):
+                    async with asyncio.timeout_at(deadline):
+                        context = await rag.aquery(query, param=replace(param, only_need_context=True))
+                metadata = {
+                    "mode": mode,
+                    "cache": "MISS",
+                    "retrieval_seconds": round(time.perf_counter() - started, 3),
+                    "context_chars": len(context) if isinstance(context, str) else 0,
+                }
+                yield "metadata", metadata
+
+                if not context or context == PROMPTS["fail_response"]:
+                    yield "token", PROMPTS["fail_response"]
+                    yield "done", {}
+                    return
+                if param.only_need_context:
+                    yield "token", context
+                    yield "done", {}
+                    return
+
+                if mode == "naive":
+                    sys_prompt = PROMPTS["naive_rag_response"].format(content_data=context, response_type=param.response_type)
+                else:
+                    sys_prompt = PROMPTS["rag_response"].format(context_data=context, response_type=param.response_type)
+
+                # Only the upstream awaits count as generation time, not the client reading tokens
+                generation_seconds = 0.0
+                with span("query.generation") as generation:
+                    try:
+                        waited = time.perf_counter()
+                        async with asyncio.timeout_at(deadline):
+                            response = await rag.llm_model_func(query, system_prompt=sys_prompt, stream=True)
+                        generation_seconds += time.perf_counter() - waited
+                        if isinstance(response, str):
+                            yield "token", response
+                            answer = response
+                        else:
+                            pieces = []
+                            try:
+                                while True:
+                                    waited = time.perf_counter()
+                                    try:
+                                        piece = await response.__anext__()
+                                    except StopAsyncIteration:
+                                        break
+                                    finally:
+                                        generation_seconds += time.perf_counter() - waited
+                                    pieces.append(piece)
+                                    yield "token", piece
+                            finally:
+                                if hasattr(response, "aclose"):
+                                    await response.aclose()
+                            answer = "".join(pieces)
+                    finally:
+                        record_stage("query", "generation", generation_seconds)
+                        if generation:
+                            generation.set("upstream_seconds", round(generation_seconds, 3))
+
+                self.mode_router.record(mode, metadata["retrieval_seconds"] + generation_seconds, answer, method == "auto")
+                await self.answer_cache.set(query, mode, params, answer, scope, version)
+                yield "done", {}
+
+        except Exception as e:
+            if isinstance(e, TimeoutError) and deadline is not None and asyncio.get_running_loop().time() >= deadline:
+                yield "error", {"detail": f"Query exceeded its latency budget of {options.latency_budget_ms} ms"}
+                return
+            logger.error(f"Error streaming query: {str(e)}")
+            yield "error", {"detail": str(e)}
+
+    async def ingest_file(self, path: Path, kind: str, project: Optional[str] = None) -> int:
+        """
+        Extract a file section by section and insert it into the project's LightRAG instance.
+        Sections are grouped so one insert chunks several of them across the process pool.
+        LLM and embedding calls made here run in the scheduler's bulk lane.
+        """
+        sections = 0
+        pending: List[str] = []
+        async with self._rag_for(project) as rag:
+            with llm_priority(BULK), observe_stage("ingest", "file"):
+                async for section in iter_sections(path, kind):
+                    pending.append(section)
+                    if len(pending) >= pool_size():
+                        await ainsert_prechunked(rag, pending)
+                        sections += len(pending)
+                        pending = []
+                if pending:
+                    await ainsert_prechunked(rag, pending)
+                    sections += len(pending)
+        logger.info(f"Inserted {sections} sections from {path}")
+        return sections
+
+    async def create_graph(self, data: PutBlobResult, project: Optional[str] = None):
         """Process multiple uploaded files with LightRAG"""
         try:
             if not self.rag:
                 logger.error("LightRAG not initialized")
                 logger.error(self.rag)
                 raise HTTPException(status_code=500, detail="LightRAG not initialized")
+            if project is not None:
+                validate_project(project)
             
-            @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-            async def fetch_url(client: httpx.AsyncClient, url: str) -> str:
-                logger.info(f"Fetching content from: {url}")
-                if url.startswith('file://'):
-                    file_path = url[7:]
-                    logger.info(f"Reading local file: {file_path}")
-                    with open(file_path, 'r') as f:
-                        return f.read()
-                else:
-                    timeout = httpx.Timeout(30.0, connect=10.0)  # 30s total timeout, 10s connect timeout
-                    response = await client.get(url, timeout=timeout)
-                    response.raise_for_status()
-                    return response.text
-
-            async def process_url(url: str) -> str:
-                try:
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        return await fetch_url(client, url)
-                except Exception as e:
-                    logger.error(f"Error processing URL {url}: {str(e)}")
-                    raise
-
-            # Process URLs in smaller batches to avoid overwhelming the system
+            # Download files in small batches, then extract and insert them one by one
             batch_size = 5
-            all_contents: List[str] = []
-            
-            for i in range(0, len(data.urls), batch_size):
-                batch_urls = data.urls[i:i + batch_size]
-                logger.info(f"Processing batch {i//batch_size + 1} with {len(batch_urls)} URLs")
-                
-                try:
-                    batch_contents = await asyncio.gather(
-                        *[process_url(url) for url in batch_urls],
-                        return_exceptions=True
-                    )
-                    
-                    # Filter out any errors and log them
-                    for url, content in zip(batch_urls, batch_contents):
-                        if isinstance(content, Exception):
-                            logger.error(f"Failed to process {url}: {str(content)}")
-                        else:
-                            all_contents.append(content)
-                
-                except Exception as e:
-                    logger.error(f"Batch processing error: {str(e)}")
-                    continue
-
-            # Insert successful contents into RAG
+            content_types = data.content_types or []
             success_count = 0
-            for content in all_contents:
-                try:
-                    await self.rag.ainsert(content)
-                    success_count += 1
-                except Exception as e:
-                    logger.error(f"Error inserting content into RAG: {str(e)}")
+
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                for i in range(0, len(data.urls), batch_size):
+                    batch_urls = data.urls[i:i + batch_size]
+                    logger.info(f"Processing batch {i//batch_size + 1} with {len(batch_urls)} URLs")
+
+                    with observe_stage("ingest", "fetch"):
+                        batch_paths = await asyncio.gather(
+                            *[download_to_disk(client, url, self.input_path) for url in batch_urls],
+                            return_exceptions=True
+                        )
+
+                    for offset, (url, path) in enumerate(zip(batch_urls, batch_paths)):
+                        if isinstance(path, Exception):
+                            logger.error(f"Failed to download {url}: {str(path)}")
+                            continue
+
+                        index = i + offset
+                        content_type = content_types[index] if index < len(content_types) else None
+                        pathname = data.pathnames[index] if index < len(data.pathnames) else url
+                        try:
+                            await self.ingest_file(path, detect_kind(content_type, pathname), project)
+                            success_count += 1
+                        except Exception as e:
+                            logger.error(f"Error inserting {url} into RAG: {str(e)}")
+                        finally:
+                            if not url.startswith('file://'):
+                                path.unlink(missing_ok=True)
 
             if success_count == 0:
                 raise HTTPException(
@@ -170,11 +465,93 @@ class GraphRAGService:
                     detail="Failed to process any files successfully"
                 )
 
+            await self.answer_cache.bump_version(project or "default")
+
             return {
                 "message": f"Successfully processed {success_count} out of {len(data.urls)} files",
                 "failed": len(data.urls) - success_count
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error processing files: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def _spool_upload(self, file: UploadFile) -> Path:
+        """Copy an uploaded file to the input directory in chunks, enforcing the size limit as it goes"""
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"{file.filename} exceeds {MAX_UPLOAD_BYTES} bytes")
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.input_path, prefix="upload-", suffix=Path(file.filename or "").suffix)
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    written += len(chunk)
+                    if written > MAX_UPLOAD_BYTES:
+                        raise HTTPException(status_code=413, detail=f"{file.filename} exceeds {MAX_UPLOAD_BYTES} bytes")
+                    f.write(chunk)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        finally:
+            await file.close()
+        return Path(tmp_path)
+
+    async def _run_upload_job(self, job: UploadJob, path: Path, kind: str):
+        # Started in a detached context, so the job is its own trace rather than part of the upload request's
+        with start_trace("upload_job", job_id=job.job_id, project=job.project or "default") as root:
+            try:
+                async with self._job_semaphore:
+                    job.status = "running"
+                    job.sections = await self.ingest_file(path, kind, job.project)
+                    job.status = "done"
+                    await self.answer_cache.bump_version(job.project or "default")
+            except Exception as e:
+                logger.error(f"Upload job {job.job_id} failed: {str(e)}")
+                job.status = "failed"
+                job.error = str(e)
+                root.error = str(e)
+            finally:
+                path.unlink(missing_ok=True)
+                self._job_tasks.pop(job.job_id, None)
+        await export_trace(root)
+
+    def _prune_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ("done", "failed")]
+        for job_id in finished[:max(0, len(self.jobs) - MAX_TRACKED_JOBS)]:
+            del self.jobs[job_id]
+
+    async def upload_files(self, files: List[UploadFile], project: Optional[str] = None) -> List[UploadJob]:
+        """Spool uploaded files to disk and queue an ingestion job for each, returning the jobs immediately"""
+        if not self.rag:
+            raise HTTPException(status_code=500, detail="LightRAG not initialized")
+        if project is not None:
+            validate_project(project)
+
+        spooled = []
+        try:
+            for file in files:
+                spooled.append((file, await self._spool_upload(file)))
+        except Exception:
+            for _, path in spooled:
+                path.unlink(missing_ok=True)
+            raise
+
+        jobs = []
+        for file, path in spooled:
+            job = UploadJob(job_id=uuid.uuid4().hex, filename=file.filename or path.name, project=project)
+            self.jobs[job.job_id] = job
+            kind = detect_kind(file.content_type, file.filename)
+            self._job_tasks[job.job_id] = asyncio.create_task(self._run_upload_job(job, path, kind), context=detached_context())
+            jobs.append(job)
+
+        self._prune_jobs()
+        return jobs
+
+    def get_job(self, job_id: str) -> UploadJob:
+        job = self.jobs.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+        return job
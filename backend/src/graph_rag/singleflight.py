@@ -0,0 +1,49 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+from ..utils.tracing import detached_context
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The work runs in its own task, and each caller awaits it through asyncio.shield, so a
+    caller that is cancelled (e.g. its client disconnected) only stops waiting. The work
+    itself is cancelled once every caller has gone. The task does not inherit the first
+    caller's trace, which it can outlive; fn starts its own if it wants one.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(fn(), context=detached_context()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
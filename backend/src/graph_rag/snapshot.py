@@ -0,0 +1,312 @@
+"""
+Export a project's knowledge graph, vectors and key-value data to a snapshot directory and load
+it back, into the same or other storage backends, without re-running extraction or embedding.
+
+    cd backend
+    python -m src.graph_rag.snapshot export snapshots/acme --project acme
+    python -m src.graph_rag.snapshot import snapshots/acme --project acme-staging
+    python -m src.graph_rag.snapshot import snapshots/acme --graph-storage CSRGraphStorage
+    python -m src.graph_rag.snapshot import-graphml local_neo4jWorkDir/graph_chunk_entity_relation.graphml
+
+A snapshot is one series of gzipped JSON-lines parts per stream (graph nodes, graph edges, the
+vectors of each vector store and the items of each KV store), at most --part-size records each,
+plus a manifest.json written last. Vectors are kept as base64 float32, so they are upserted back
+as they are. Imports go through the storages' bulk methods: batched UNWIND writes for Neo4j,
+batched vector upserts for Pinecone and bulk writes for Mongo.
+
+Both directions resume after a failure. Export skips the streams it already finished and import
+skips the parts it already loaded; progress is kept next to the parts in .export-progress.json
+and .import-progress.json. Every import is an upsert, so loading a part twice is harmless.
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+from lightrag import LightRAG
+
+from ..utils.logger import logger
+from .metrics import observe_stage
+
+FORMAT_VERSION = 1
+PART_SIZE = int(os.environ.get("SNAPSHOT_PART_SIZE", 50_000))
+BATCH_SIZE = int(os.environ.get("SNAPSHOT_BATCH_SIZE", 1000))
+MANIFEST = "manifest.json"
+EXPORT_PROGRESS = ".export-progress.json"
+IMPORT_PROGRESS = ".import-progress.json"
+
+# Bulk methods each kind of stream needs, for export and for import; KV stores without
+# iter_items/upsert_items fall back to BaseKVStorage's all_keys, get_by_ids and upsert
+REQUIRED_METHODS = {
+    "nodes": ("iter_nodes", "upsert_nodes"),
+    "edges": ("iter_edges", "upsert_edges"),
+    "vectors": ("iter_vectors", "upsert_vectors"),
+    "items": ("all_keys", "upsert"),
+}
+
+
+def encode_vector(values) -> str:
+    return base64.b64encode(np.asarray(values, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_vector(encoded: str) -> List[float]:
+    return np.frombuffer(base64.b64decode(encoded), dtype="<f4").tolist()
+
+
+def snapshot_streams(rag: LightRAG) -> Dict[str, Tuple[Any, str]]:
+    """Every stream of a LightRAG instance, keyed "<namespace>.<kind>", in the order they are loaded"""
+    graph = rag.chunk_entity_relation_graph
+    stores = [(graph, "nodes"), (graph, "edges")]
+    stores += [(storage, "vectors") for storage in (rag.entities_vdb, rag.relationships_vdb, rag.chunks_vdb)]
+    stores += [(storage, "items") for storage in (rag.full_docs, rag.text_chunks, rag.llm_response_cache) if storage is not None]
+    return {f"{storage.namespace}.{kind}": (storage, kind) for storage, kind in stores}
+
+
+def _check_support(streams: Dict[str, Tuple[Any, str]], direction: int):
+    missing = [
+        f"{type(storage).__name__}.{REQUIRED_METHODS[kind][direction]}"
+        for storage, kind in streams.values()
+        if not hasattr(storage, REQUIRED_METHODS[kind][direction])
+    ]
+    if missing:
+        raise ValueError(f"Storage does not support snapshots, missing {', '.join(sorted(set(missing)))}")
+
+
+async def _read(storage, kind: str, batch_size: int) -> AsyncIterator[List[dict]]:
+    if kind == "nodes":
+        async for batch in storage.iter_nodes(batch_size):
+            yield [{"id": node_id, "data": data} for node_id, data in batch]
+    elif kind == "edges":
+        async for batch in storage.iter_edges(batch_size):
+            yield [{"src": src_id, "tgt": tgt_id, "data": data} for src_id, tgt_id, data in batch]
+    elif kind == "vectors":
+        async for batch in storage.iter_vectors(batch_size):
+            yield [{"id": v["id"], "values": encode_vector(v["values"]), "metadata": v["metadata"]} for v in batch]
+    elif hasattr(storage, "iter_items"):
+        async for batch in storage.iter_items(batch_size):
+            yield [{"id": key, "value": value} for key, value in batch]
+    else:
+        keys = await storage.all_keys()
+        for i in range(0, len(keys), batch_size):
+            ids = keys[i:i + batch_size]
+            values = await storage.get_by_ids(ids)
+            yield [{"id": key, "value": value} for key, value in zip(ids, values) if value is not None]
+
+
+async def _load(storage, kind: str, records: List[dict]):
+    if kind == "nodes":
+        await storage.upsert_nodes([(r["id"], r["data"]) for r in records])
+    elif kind == "edges":
+        await storage.upsert_edges([(r["src"], r["tgt"], r["data"]) for r in records])
+    elif kind == "vectors":
+        await storage.upsert_vectors([{"id": r["id"], "values": decode_vector(r["values"]), "metadata": r["metadata"]} for r in records])
+    elif hasattr(storage, "upsert_items"):
+        await storage.upsert_items([(r["id"], r["value"]) for r in records])
+    else:
+        await storage.upsert({r["id"]: r["value"] for r in records})
+
+
+def _write_part(path: str, records: List[dict]):
+    with gzip.open(path + ".tmp", "wt", encoding="utf-8", compresslevel=6) as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def _read_part(path: str) -> List[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _load_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_json(path: str, data):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+async def export_snapshot(rag: LightRAG, path: str, project: Optional[str] = None,
+                          part_size: int = PART_SIZE, batch_size: int = BATCH_SIZE) -> dict:
+    """Write every stream of rag to path and return the manifest"""
+    streams = snapshot_streams(rag)
+    _check_support(streams, 0)
+    graph = rag.chunk_entity_relation_graph
+    if hasattr(graph, "ensure_id_index"):
+        # Export pages with WHERE n.id > $after ORDER BY n.id, a label scan and sort per page without it
+        await asyncio.to_thread(graph.ensure_id_index)
+    os.makedirs(path, exist_ok=True)
+    progress_path = os.path.join(path, EXPORT_PROGRESS)
+    progress = _load_json(progress_path, {})
+
+    with observe_stage("snapshot", "export"):
+        for key, (storage, kind) in streams.items():
+            if key in progress:
+                logger.info(f"Skipping {key}, exported by an earlier run")
+                continue
+            parts, pending = [], []
+            count = 0
+
+            async def write(records):
+                nonlocal count
+                name = f"{key}.{len(parts):05d}.jsonl.gz"
+                await asyncio.to_thread(_write_part, os.path.join(path, name), records)
+                parts.append(name)
+                count += len(records)
+                logger.info(f"Exported {count} records of {key}")
+
+            async for batch in _read(storage, kind, batch_size):
+                pending.extend(batch)
+                while len(pending) >= part_size:
+                    await write(pending[:part_size])
+                    pending = pending[part_size:]
+            if pending:
+                await write(pending)
+            progress[key] = {"parts": parts, "records": count}
+            _save_json(progress_path, progress)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "project": project,
+        "embedding_dim": rag.embedding_func.embedding_dim,
+        "storage": {"graph_storage": rag.graph_storage, "vector_storage": rag.vector_storage, "kv_storage": rag.kv_storage},
+        "streams": progress,
+    }
+    _save_json(os.path.join(path, MANIFEST), manifest)
+    os.remove(progress_path)
+    return manifest
+
+
+async def import_snapshot(rag: LightRAG, path: str, project: Optional[str] = None,
+                          batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Upsert every part of the snapshot at path into rag and return the records loaded per stream"""
+    manifest = _load_json(os.path.join(path, MANIFEST), None)
+    if manifest is None:
+        raise ValueError(f"{path} has no {MANIFEST}; export it again to finish it")
+    if manifest["format"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest['format']}")
+    has_vectors = any(stream["records"] for key, stream in manifest["streams"].items() if key.endswith(".vectors"))
+    if has_vectors and manifest["embedding_dim"] != rag.embedding_func.embedding_dim:
+        raise ValueError(f"Snapshot vectors have {manifest['embedding_dim']} dimensions, the embedding model {rag.embedding_func.embedding_dim}")
+
+    streams = snapshot_streams(rag)
+    _check_support({key: streams[key] for key, stream in manifest["streams"].items() if key in streams and stream["records"]}, 1)
+
+    # Progress only counts for the same target; loading into another one starts over
+    target = f"{rag.graph_storage}/{rag.vector_storage}/{rag.kv_storage}/{project or 'default'}"
+    progress_path = os.path.join(path, IMPORT_PROGRESS)
+    progress = _load_json(progress_path, {})
+    done = set(progress.get("parts", [])) if progress.get("target") == target else set()
+
+    graph = rag.chunk_entity_relation_graph
+    if hasattr(graph, "ensure_id_index"):
+        # Every UNWIND row MERGEs on id, which is a label scan without this index
+        await asyncio.to_thread(graph.ensure_id_index)
+
+    loaded: Dict[str, int] = {}
+    with observe_stage("snapshot", "import"):
+        for key, stream in manifest["streams"].items():
+            if key not in streams:
+                logger.warning(f"Skipping {key}, which this LightRAG instance has no store for")
+                continue
+            storage, kind = streams[key]
+            for part in stream["parts"]:
+                if part in done:
+                    continue
+                records = await asyncio.to_thread(_read_part, os.path.join(path, part))
+                for i in range(0, len(records), batch_size):
+                    await _load(storage, kind, records[i:i + batch_size])
+                # File-backed storages only persist here, so a part only counts as loaded after it
+                await _persist(storage)
+                done.add(part)
+                _save_json(progress_path, {"target": target, "parts": sorted(done)})
+                loaded[key] = loaded.get(key, 0) + len(records)
+                logger.info(f"Imported {part}, {loaded[key]} of {stream['records']} records of {key}")
+
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+    return loaded
+
+
+async def _persist(storage) -> None:
+    """index_done_callback, unless the storage throttles it and has a flush that writes unconditionally"""
+    flush = getattr(storage, "flush", None)
+    await (flush() if flush is not None else storage.index_done_callback())
+
+
+async def import_graphml(rag: LightRAG, path: str, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Bulk load a GraphML file written by LightRAG's NetworkXStorage into rag's graph storage"""
+    graph_storage = rag.chunk_entity_relation_graph
+    _check_support({"graph.nodes": (graph_storage, "nodes"), "graph.edges": (graph_storage, "edges")}, 1)
+    graph = await asyncio.to_thread(nx.read_graphml, path)
+    if hasattr(graph_storage, "ensure_id_index"):
+        await asyncio.to_thread(graph_storage.ensure_id_index)
+
+    nodes = list(graph.nodes(data=True))
+    edges = list(graph.edges(data=True))
+    with observe_stage("snapshot", "import_graphml"):
+        for i in range(0, len(nodes), batch_size):
+            await graph_storage.upsert_nodes(nodes[i:i + batch_size])
+        for i in range(0, len(edges), batch_size):
+            await graph_storage.upsert_edges(edges[i:i + batch_size])
+        await _persist(graph_storage)
+    return {"nodes": len(nodes), "edges": len(edges)}
+
+
+async def main(args):
+    from .services import GraphRAGService
+
+    overrides = {
+        "graph_storage": args.graph_storage,
+        "vector_storage": args.vector_storage,
+        "kv_storage": args.kv_storage,
+    }
+    service = GraphRAGService(storage={name: value for name, value in overrides.items() if value})
+    await service.setup_directories()
+    try:
+        async with service._rag_for(args.project) as rag:
+            if args.command == "export":
+                manifest = await export_snapshot(rag, args.path, args.project, args.part_size, args.batch_size)
+                counts = {key: stream["records"] for key, stream in manifest["streams"].items()}
+            elif args.command == "import":
+                counts = await import_snapshot(rag, args.path, args.project, args.batch_size)
+            else:
+                counts = await import_graphml(rag, args.path, args.batch_size)
+    finally:
+        await service.close()
+    for key, count in counts.items():
+        print(f"{key}: {count}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "import", "import-graphml"])
+    parser.add_argument("path", help="snapshot directory, or the GraphML file for import-graphml")
+    parser.add_argument("--project", help="project to export from or import into (default: the default project)")
+    parser.add_argument("--graph-storage", help="graph storage class, e.g. CSRGraphStorage (default: GRAPH_STORAGE)")
+    parser.add_argument("--vector-storage", help="vector storage class (default: the service's)")
+    parser.add_argument("--kv-storage", help="key-value storage class (default: the service's)")
+    parser.add_argument("--part-size", type=int, default=PART_SIZE, help=f"records per part file (default: {PART_SIZE})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"records per read page and bulk write (default: {BATCH_SIZE})")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        asyncio.run(main(args))
+    except ValueError as e:
+        sys.exit(f"Snapshot failed: {e}")
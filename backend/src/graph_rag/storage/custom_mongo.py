@@ -0,0 +1,38 @@
+import os
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from pymongo import UpdateOne
+from lightrag.kg.mongo_impl import MongoKVStorage
+from lightrag.utils import logger
+from .connections import get_mongo_client
+
+
+@dataclass
+class ProjectMongoKVStorage(MongoKVStorage):
+    """MongoKVStorage on the shared Mongo client, with one collection set per project"""
+
+    def __post_init__(self):
+        database = get_mongo_client().get_database(os.environ.get("MONGO_DATABASE", "LightRAG"))
+        project = self.global_config.get("addon_params", {}).get("project")
+        collection = f"{project}__{self.namespace}" if project else self.namespace
+        self._data = database.get_collection(collection)
+        logger.info(f"Use MongoDB as KV {collection}")
+
+    # Bulk export and import, used by graph snapshots
+
+    async def iter_items(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[str, Dict[str, Any]]]]:
+        """Yield every document as (key, value) from a single cursor"""
+        batch = []
+        for document in self._data.find({}, batch_size=batch_size):
+            key = document.pop("_id")
+            batch.append((key, document))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def upsert_items(self, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Same effect as upsert(), in one unordered bulk write instead of a round trip per key"""
+        if items:
+            self._data.bulk_write([UpdateOne({"_id": key}, {"$set": value}, upsert=True) for key, value in items], ordered=False)
@@ -1,23 +1,35 @@
-from typing import Dict, List, Optional, Set, Tuple, Any
-from neo4j import GraphDatabase
+from typing import Dict, List, Optional, Set, Tuple, Any, AsyncIterator
 from lightrag.base import BaseGraphStorage
-import os
+from .connections import get_neo4j_driver
+from ..metrics import instrument_storage
 
+
+def node_label(project: Optional[str] = None) -> str:
+    """Projects get their own node label; the default project keeps the original :Node label"""
+    return f"Node_{project}" if project else "Node"
+
+
+def neo4j_properties(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Neo4j only stores primitives, so everything else is stored as its string form"""
+    return {k: str(v) if not isinstance(v, (int, float, bool)) else v for k, v in (data or {}).items()}
+
+
+@instrument_storage("neo4j")
 class CustomNeo4JStorage(BaseGraphStorage):
     def __init__(self, namespace: str, global_config: dict, **kwargs):
         super().__init__(namespace, global_config)
-        # Initialize Neo4j connection
-        self.uri = os.environ.get('NEO4J_URI', "neo4j://neo4j:7687")
-        self.username = os.environ.get('NEO4J_USERNAME', "neo4j")
-        self.password = os.environ.get('NEO4J_PASSWORD', "HardPassword4435")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.username, self.password))
+        # Neo4j connections come from the process-wide driver pool
+        self.driver = get_neo4j_driver()
+        self.project = global_config.get("addon_params", {}).get("project")
+        self._label = node_label(self.project)
+
+    def _cypher(self, query: str) -> str:
+        return query.replace(":Node", f":`{self._label}`")
 
     async def upsert_node(self, node_id: str, node_data: Dict[str, Any] = None) -> None:
         """Create or update a node with properties"""
         with self.driver.session() as session:
-            # Convert node_data to string properties
-            properties = {k: str(v) if not isinstance(v, (int, float, bool)) else v 
-                         for k, v in (node_data or {}).items()}
+            properties = neo4j_properties(node_data)
             properties['id'] = node_id  # Ensure ID is set in properties
             
             query = (
@@ -25,14 +37,12 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "SET n += $properties "
                 "RETURN n"
             )
-            session.run(query, node_id=node_id, properties=properties)
+            session.run(self._cypher(query), node_id=node_id, properties=properties)
 
     async def upsert_edge(self, src_id: str, tgt_id: str, edge_data: Dict[str, Any] = None) -> None:
         """Create or update an edge between nodes with properties"""
         with self.driver.session() as session:
-            # Convert edge_data to string properties
-            properties = {k: str(v) if not isinstance(v, (int, float, bool)) else v 
-                         for k, v in (edge_data or {}).items()}
+            properties = neo4j_properties(edge_data)
             
             query = (
                 "MERGE (src:Node {id: $src_id}) "
@@ -41,12 +51,12 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "SET r += $properties "
                 "RETURN r"
             )
-            session.run(query, src_id=src_id, tgt_id=tgt_id, properties=properties)
+            session.run(self._cypher(query), src_id=src_id, tgt_id=tgt_id, properties=properties)
 
     async def delete_node(self, node_id: str) -> None:
         with self.driver.session() as session:
             query = "MATCH (n:Node {id: $node_id}) DETACH DELETE n"
-            session.run(query, node_id=node_id)
+            session.run(self._cypher(query), node_id=node_id)
 
     async def delete_edge(self, src_id: str, tgt_id: str) -> None:
         with self.driver.session() as session:
@@ -54,7 +64,7 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "MATCH (src:Node {id: $src_id})-[r:RELATES_TO]->(tgt:Node {id: $tgt_id}) "
                 "DELETE r"
             )
-            session.run(query, src_id=src_id, tgt_id=tgt_id)
+            session.run(self._cypher(query), src_id=src_id, tgt_id=tgt_id)
 
     async def get_node_neighbors(
         self, node_id: str, edge_type: Optional[str] = None
@@ -64,14 +74,14 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "MATCH (n:Node {id: $node_id})-[:RELATES_TO]-(neighbor) "
                 "RETURN collect(neighbor.id) as neighbors"
             )
-            result = session.run(query, node_id=node_id)
+            result = session.run(self._cypher(query), node_id=node_id)
             record = result.single()
             return set(record["neighbors"] if record else [])
 
     async def get_node_data(self, node_id: str) -> Optional[Dict[str, Any]]:
         with self.driver.session() as session:
             query = "MATCH (n:Node {id: $node_id}) RETURN properties(n) as props"
-            result = session.run(query, node_id=node_id)
+            result = session.run(self._cypher(query), node_id=node_id)
             record = result.single()
             return record["props"] if record else None
 
@@ -83,14 +93,14 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "MATCH (src:Node {id: $src_id})-[r:RELATES_TO]->(tgt:Node {id: $tgt_id}) "
                 "RETURN properties(r) as props"
             )
-            result = session.run(query, src_id=src_id, tgt_id=tgt_id)
+            result = session.run(self._cypher(query), src_id=src_id, tgt_id=tgt_id)
             record = result.single()
             return record["props"] if record else None
 
     async def has_node(self, node_id: str) -> bool:
         with self.driver.session() as session:
             query = "MATCH (n:Node {id: $node_id}) RETURN count(n) as count"
-            result = session.run(query, node_id=node_id)
+            result = session.run(self._cypher(query), node_id=node_id)
             return result.single()["count"] > 0
 
     async def has_edge(self, src_id: str, tgt_id: str) -> bool:
@@ -99,7 +109,7 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "MATCH (src:Node {id: $src_id})-[r:RELATES_TO]->(tgt:Node {id: $tgt_id}) "
                 "RETURN count(r) as count"
             )
-            result = session.run(query, src_id=src_id, tgt_id=tgt_id)
+            result = session.run(self._cypher(query), src_id=src_id, tgt_id=tgt_id)
             return result.single()["count"] > 0
 
     async def edge_degree(self, src_id: str, tgt_id: str) -> int:
@@ -111,7 +121,7 @@ class CustomNeo4JStorage(BaseGraphStorage):
     async def get_all_nodes(self) -> List[str]:
         with self.driver.session() as session:
             query = "MATCH (n:Node) RETURN collect(n.id) as nodes"
-            result = session.run(query)
+            result = session.run(self._cypher(query))
             record = result.single()
             return record["nodes"] if record else []
 
@@ -121,7 +131,7 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "MATCH (src:Node)-[:RELATES_TO]->(tgt:Node) "
                 "RETURN collect([src.id, tgt.id]) as edges"
             )
-            result = session.run(query)
+            result = session.run(self._cypher(query))
             record = result.single()
             return [tuple(edge) for edge in (record["edges"] if record else [])]
 
@@ -136,7 +146,7 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "MATCH (n:Node {id: $node_id}) "
                 "RETURN n.id as id, properties(n) as props"
             )
-            result = session.run(query, node_id=node_id)
+            result = session.run(self._cypher(query), node_id=node_id)
             record = result.single()
             if record:
                 props = record["props"]
@@ -166,7 +176,7 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "MATCH (n:Node {id: $node_id})-[r]-() "
                 "RETURN COUNT(r) as degree"
             )
-            result = session.run(query, node_id=node_id)
+            result = session.run(self._cypher(query), node_id=node_id)
             record = result.single()
             return record["degree"] if record else 0
 
@@ -194,7 +204,7 @@ class CustomNeo4JStorage(BaseGraphStorage):
             
             edges = []
             # Process outgoing edges
-            result = session.run(outgoing_query, node_id=node_id)
+            result = session.run(self._cypher(outgoing_query), node_id=node_id)
             for record in result:
                 edges.append((
                     record["src_id"],
@@ -202,7 +212,7 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 ))
             
             # Process incoming edges
-            result = session.run(incoming_query, node_id=node_id)
+            result = session.run(self._cypher(incoming_query), node_id=node_id)
             for record in result:
                 edges.append((
                     record["src_id"],
@@ -227,7 +237,7 @@ class CustomNeo4JStorage(BaseGraphStorage):
                 "MATCH (src:Node {id: $src_id})-[r:RELATES_TO]->(tgt:Node {id: $tgt_id}) "
                 "RETURN properties(r) as props"
             )
-            result = session.run(query, src_id=src_id, tgt_id=tgt_id)
+            result = session.run(self._cypher(query), src_id=src_id, tgt_id=tgt_id)
             record = result.single()
             if record:
                 return record["props"]
@@ -241,6 +251,62 @@ class CustomNeo4JStorage(BaseGraphStorage):
             results.append(edge)
         return results
 
-    def __del__(self):
-        if hasattr(self, 'driver'):
-            self.driver.close() 
\ No newline at end of file
+    # Bulk export and import, used by graph snapshots
+
+    async def iter_nodes(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[str, Dict[str, Any]]]]:
+        """Yield every node as (id, properties) in pages ordered by id, one short query per page"""
+        after = ""
+        while True:
+            with self.driver.session() as session:
+                query = (
+                    "MATCH (n:Node) WHERE n.id > $after "
+                    "RETURN n.id as id, properties(n) as props ORDER BY n.id LIMIT $limit"
+                )
+                records = session.run(self._cypher(query), after=after, limit=batch_size).data()
+            if not records:
+                return
+            yield [(record["id"], {k: v for k, v in record["props"].items() if k != "id"}) for record in records]
+            after = records[-1]["id"]
+
+    async def iter_edges(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[str, str, Dict[str, Any]]]]:
+        """Yield every edge as (source, target, properties), paging over source nodes by id"""
+        after = ""
+        while True:
+            with self.driver.session() as session:
+                query = (
+                    "MATCH (src:Node) WHERE src.id > $after "
+                    "WITH src ORDER BY src.id LIMIT $limit "
+                    "OPTIONAL MATCH (src)-[r:RELATES_TO]->(tgt:Node) "
+                    "RETURN src.id as src_id, tgt.id as tgt_id, properties(r) as props"
+                )
+                records = session.run(self._cypher(query), after=after, limit=batch_size).data()
+            if not records:
+                return
+            edges = [(record["src_id"], record["tgt_id"], record["props"]) for record in records if record["tgt_id"] is not None]
+            if edges:
+                yield edges
+            after = max(record["src_id"] for record in records)
+
+    def ensure_id_index(self) -> None:
+        with self.driver.session() as session:
+            session.run(f"CREATE INDEX `{self._label}_id` IF NOT EXISTS FOR (n:`{self._label}`) ON (n.id)")
+
+    async def upsert_nodes(self, nodes: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Create or update many nodes in one UNWIND write"""
+        rows = [{"id": node_id, "properties": {**neo4j_properties(data), "id": node_id}} for node_id, data in nodes]
+        query = "UNWIND $rows AS row MERGE (n:Node {id: row.id}) SET n += row.properties"
+        with self.driver.session() as session:
+            session.execute_write(lambda tx: tx.run(self._cypher(query), rows=rows).consume())
+
+    async def upsert_edges(self, edges: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Create or update many edges, and any missing endpoints, in one UNWIND write"""
+        rows = [{"src": src_id, "tgt": tgt_id, "properties": neo4j_properties(data)} for src_id, tgt_id, data in edges]
+        query = (
+            "UNWIND $rows AS row "
+            "MERGE (src:Node {id: row.src}) "
+            "MERGE (tgt:Node {id: row.tgt}) "
+            "MERGE (src)-[r:RELATES_TO]->(tgt) "
+            "SET r += row.properties"
+        )
+        with self.driver.session() as session:
+            session.execute_write(lambda tx: tx.run(self._cypher(query), rows=rows).consume())
@@ -1,12 +1,18 @@
 import asyncio
 from dataclasses import dataclass
 import os
+from typing import Any, AsyncIterator, Dict, List
 from tqdm.asyncio import tqdm as tqdm_async
 from pinecone import Pinecone
 from lightrag.utils import logger
 from lightrag.base import BaseVectorStorage
+from .connections import ensure_pinecone_index, get_pinecone_index
+from ..metrics import instrument_storage
 
+PINECONE_LIST_LIMIT = 100
 
+
+@instrument_storage("pinecone")
 @dataclass
 class PineconeVectorDBStorage(BaseVectorStorage):
     @staticmethod
@@ -21,31 +27,12 @@ class PineconeVectorDBStorage(BaseVectorStorage):
         )
 
     def __post_init__(self):
-        # Initialize Pinecone first
-        pc = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
+        # Pinecone client and index checks are shared across all storages in the process
         self._max_batch_size = self.global_config["embedding_batch_num"]
-        
-        # Check if index exists before trying to create it
-        existing_indexes = pc.list_indexes().names()
-        if self.namespace not in existing_indexes:
-            try:
-                from pinecone import ServerlessSpec
-                pc.create_index(
-                    name=self.namespace,
-                    dimension=self.embedding_func.embedding_dim,
-                    metric="cosine",
-                    spec=ServerlessSpec(
-                        cloud="aws",
-                        region="us-east-1"
-                    )
-                )
-            except Exception as e:
-                # If index was created between our check and create attempt, that's okay
-                if "ALREADY_EXISTS" not in str(e):
-                    raise e
-        
-        # Only get the index after we're sure it exists
-        self._index = pc.Index(self.namespace)
+        ensure_pinecone_index(self.namespace, self.embedding_func.embedding_dim)
+        self._index = get_pinecone_index(self.namespace)
+        # Each project writes to its own Pinecone namespace within the shared index
+        self._pinecone_namespace = self.global_config.get("addon_params", {}).get("project") or ""
 
     async def upsert(self, data: dict[str, dict]):
         logger.info(f"Inserting {len(data)} vectors to {self.namespace}")
@@ -83,7 +70,7 @@ class PineconeVectorDBStorage(BaseVectorStorage):
         # Upsert in batches
         for i in range(0, len(vectors), self._max_batch_size):
             batch = vectors[i:i + self._max_batch_size]
-            self._index.upsert(vectors=batch)
+            self._index.upsert(vectors=batch, namespace=self._pinecone_namespace)
 
         return [v[0] for v in vectors]  # Return list of IDs
 
@@ -92,7 +79,8 @@ class PineconeVectorDBStorage(BaseVectorStorage):
         results = self._index.query(
             vector=embedding[0].tolist(),
             top_k=top_k,
-            include_metadata=True
+            include_metadata=True,
+            namespace=self._pinecone_namespace
         )
         
         return [
@@ -103,3 +91,30 @@ class PineconeVectorDBStorage(BaseVectorStorage):
             }
             for match in results.matches
         ]
+
+    # Bulk export and import of stored vectors, used by graph snapshots; nothing is re-embedded
+
+    async def iter_vectors(self, batch_size: int = 100) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield every vector in the project's namespace as {"id", "values", "metadata"} dicts"""
+        pending: List[str] = []
+        # list pages hold at most 100 ids, so larger batches are gathered over several pages
+        for ids in self._index.list(namespace=self._pinecone_namespace, limit=min(batch_size, PINECONE_LIST_LIMIT)):
+            pending.extend(ids)
+            while len(pending) >= batch_size:
+                yield self._fetch_vectors(pending[:batch_size])
+                pending = pending[batch_size:]
+        if pending:
+            yield self._fetch_vectors(pending)
+
+    def _fetch_vectors(self, ids: List[str]) -> List[Dict[str, Any]]:
+        fetched = self._index.fetch(ids=ids, namespace=self._pinecone_namespace)
+        return [
+            {"id": vector.id, "values": list(vector.values), "metadata": dict(vector.metadata or {})}
+            for vector in fetched.vectors.values()
+        ]
+
+    async def upsert_vectors(self, vectors: List[Dict[str, Any]]) -> None:
+        # Pinecone takes at most 2MB per request, about a hundred 1536-dimensional vectors
+        for i in range(0, len(vectors), 100):
+            batch = [(v["id"], v["values"], v["metadata"]) for v in vectors[i:i + 100]]
+            self._index.upsert(vectors=batch, namespace=self._pinecone_namespace, show_progress=False)
@@ -0,0 +1,377 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from lightrag.base import BaseGraphStorage
+from lightrag.utils import logger
+
+from ..metrics import instrument_storage
+
+# Seconds between snapshots. Each one rewrites the whole graph, so inserts in between are
+# batched; 0 writes one after every insert, like LightRAG's NetworkXStorage
+CSR_SNAPSHOT_INTERVAL = float(os.environ.get("CSR_SNAPSHOT_INTERVAL", 30))
+SNAPSHOT_ARRAYS = ("indptr", "indices", "edge_ids", "edge_src", "edge_dst", "degree")
+
+
+@instrument_storage("csr")
+@dataclass
+class CSRGraphStorage(BaseGraphStorage):
+    """
+    Undirected in-process graph with the same semantics as LightRAG's NetworkXStorage.
+
+    Node ids are interned to dense integers. Edges live in append-only endpoint arrays keyed by
+    their sorted endpoint pair, and degrees are kept up to date on every write, so has_edge,
+    get_edge and node_degree are O(1). Neighbor lookups read a CSR adjacency (indptr, indices,
+    edge_ids) that is rebuilt with numpy on the first read after the edge set changed, which
+    during ingestion means rarely. The bulk methods take lists and index the arrays in one go.
+
+    Snapshots go to graph_<namespace>.csr/ in the working dir: the arrays as .npy files that
+    are memory-mapped on load, so a restart serves neighbor lookups straight from the page
+    cache, and the node and edge attributes as JSON.
+    """
+
+    def __post_init__(self):
+        self._snapshot_root = os.path.join(self.global_config["working_dir"], f"graph_{self.namespace}.csr")
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._node_data: List[Optional[dict]] = []
+        self._degree = np.zeros(1024, dtype=np.int64)
+        self._edge_src = array("q")
+        self._edge_dst = array("q")
+        self._edge_data: List[Optional[dict]] = []
+        self._edge_index: Dict[Tuple[int, int], int] = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._edge_ids = np.zeros(0, dtype=np.int64)
+        self._csr_dirty = False
+        # Writes so far and writes covered by the last snapshot on disk
+        self._changes = 0
+        self._saved_changes = 0
+        self._last_snapshot = 0.0
+        self._snapshot_lock = asyncio.Lock()
+        self._scheduled_snapshot: Optional[asyncio.Task] = None
+        self._load_snapshot()
+
+    # Interning and CSR maintenance
+
+    def _intern(self, node_id: str) -> int:
+        index = self._index.get(node_id)
+        if index is None:
+            index = len(self._ids)
+            self._index[node_id] = index
+            self._ids.append(node_id)
+            self._node_data.append(None)
+            # indptr needs a row for the new node
+            self._csr_dirty = True
+            if index >= len(self._degree):
+                self._degree = np.concatenate([self._degree, np.zeros(len(self._degree), dtype=np.int64)])
+        return index
+
+    @property
+    def _changed(self) -> bool:
+        return self._changes != self._saved_changes
+
+    def _live_index(self, node_id: str) -> Optional[int]:
+        index = self._index.get(node_id)
+        return index if index is not None and self._node_data[index] is not None else None
+
+    def _edge_key(self, source_node_id: str, target_node_id: str) -> Optional[Tuple[int, int]]:
+        src = self._index.get(source_node_id)
+        tgt = self._index.get(target_node_id)
+        if src is None or tgt is None:
+            return None
+        return (src, tgt) if src <= tgt else (tgt, src)
+
+    def _csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._csr_dirty:
+            self._rebuild_csr()
+        return self._indptr, self._indices, self._edge_ids
+
+    def _rebuild_csr(self):
+        src = np.frombuffer(self._edge_src, dtype=np.int64) if len(self._edge_src) else np.zeros(0, dtype=np.int64)
+        dst = np.frombuffer(self._edge_dst, dtype=np.int64) if len(self._edge_dst) else np.zeros(0, dtype=np.int64)
+        alive = np.fromiter((data is not None for data in self._edge_data), dtype=bool, count=len(self._edge_data))
+        edge_ids = np.arange(len(src), dtype=np.int64)
+        # Each edge appears in both endpoints' rows, except self-loops which appear once
+        mirrored = alive & (src != dst)
+        rows = np.concatenate([src[alive], dst[mirrored]])
+        cols = np.concatenate([dst[alive], src[mirrored]])
+        ids = np.concatenate([edge_ids[alive], edge_ids[mirrored]])
+        order = np.argsort(rows, kind="stable")
+        indptr = np.zeros(len(self._ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self._ids)), out=indptr[1:])
+        self._indptr, self._indices, self._edge_ids = indptr, cols[order], ids[order]
+        self._csr_dirty = False
+
+    # Instrumented methods call these rather than each other, so each call is timed once
+
+    def _node_degree(self, node_id: str) -> int:
+        index = self._live_index(node_id)
+        return int(self._degree[index]) if index is not None else 0
+
+    def _get_edge(self, source_node_id: str, target_node_id: str) -> Optional[dict]:
+        key = self._edge_key(source_node_id, target_node_id)
+        edge = self._edge_index.get(key) if key is not None else None
+        return self._edge_data[edge] if edge is not None else None
+
+    def _node_degrees(self, node_ids: List[str]) -> np.ndarray:
+        indexes = self._indexes(node_ids)
+        return np.where(indexes >= 0, self._degree[np.maximum(indexes, 0)], 0)
+
+    def _neighbors(self, index: int) -> np.ndarray:
+        indptr, indices, _ = self._csr()
+        return indices[indptr[index]:indptr[index + 1]]
+
+    # BaseGraphStorage
+
+    async def has_node(self, node_id: str) -> bool:
+        return self._live_index(node_id) is not None
+
+    async def has_edge(self, source_node_id: str, target_node_id: str) -> bool:
+        key = self._edge_key(source_node_id, target_node_id)
+        return key is not None and key in self._edge_index
+
+    async def node_degree(self, node_id: str) -> int:
+        return self._node_degree(node_id)
+
+    async def edge_degree(self, src_id: str, tgt_id: str) -> int:
+        return self._node_degree(src_id) + self._node_degree(tgt_id)
+
+    async def get_node(self, node_id: str) -> Optional[dict]:
+        index = self._index.get(node_id)
+        return self._node_data[index] if index is not None else None
+
+    async def get_edge(self, source_node_id: str, target_node_id: str) -> Optional[dict]:
+        return self._get_edge(source_node_id, target_node_id)
+
+    async def get_node_edges(self, source_node_id: str) -> Optional[List[Tuple[str, str]]]:
+        index = self._live_index(source_node_id)
+        if index is None:
+            return None
+        return [(source_node_id, self._ids[neighbor]) for neighbor in self._neighbors(index).tolist()]
+
+    async def upsert_node(self, node_id: str, node_data: Dict[str, Any] = None) -> None:
+        self._upsert_node(node_id, node_data)
+
+    async def upsert_edge(self, source_node_id: str, target_node_id: str, edge_data: Dict[str, Any] = None) -> None:
+        self._upsert_edge(source_node_id, target_node_id, edge_data)
+
+    def _upsert_node(self, node_id: str, node_data: Optional[Dict[str, Any]]):
+        index = self._intern(node_id)
+        # Attribute dicts are replaced rather than updated, so a snapshot can serialize a shallow copy off the loop
+        self._node_data[index] = {**(self._node_data[index] or {}), **(node_data or {})}
+        self._changes += 1
+
+    def _upsert_edge(self, source_node_id: str, target_node_id: str, edge_data: Optional[Dict[str, Any]]):
+        for node_id in (source_node_id, target_node_id):
+            index = self._intern(node_id)
+            if self._node_data[index] is None:
+                self._node_data[index] = {}
+        key = self._edge_key(source_node_id, target_node_id)
+        edge = self._edge_index.get(key)
+        if edge is None:
+            self._edge_index[key] = len(self._edge_data)
+            self._edge_src.append(key[0])
+            self._edge_dst.append(key[1])
+            self._edge_data.append(dict(edge_data or {}))
+            self._degree[key[0]] += 1
+            self._degree[key[1]] += 1
+            self._csr_dirty = True
+        else:
+            self._edge_data[edge] = {**self._edge_data[edge], **(edge_data or {})}
+        self._changes += 1
+
+    async def delete_node(self, node_id: str) -> None:
+        index = self._live_index(node_id)
+        if index is None:
+            logger.warning(f"Node {node_id} not found in the graph for deletion.")
+            return
+        indptr, indices, edge_ids = self._csr()
+        for neighbor, edge in zip(indices[indptr[index]:indptr[index + 1]].tolist(), edge_ids[indptr[index]:indptr[index + 1]].tolist()):
+            self._drop_edge(edge, index, neighbor)
+        self._node_data[index] = None
+        self._degree[index] = 0
+        self._changes += 1
+
+    async def delete_edge(self, src_id: str, tgt_id: str) -> None:
+        key = self._edge_key(src_id, tgt_id)
+        edge = self._edge_index.get(key) if key is not None else None
+        if edge is not None:
+            self._drop_edge(edge, key[0], key[1])
+            self._changes += 1
+
+    def _drop_edge(self, edge: int, src: int, tgt: int):
+        if self._edge_data[edge] is None:
+            return
+        self._edge_data[edge] = None
+        self._edge_index.pop((src, tgt) if src <= tgt else (tgt, src), None)
+        self._degree[src] -= 1
+        self._degree[tgt] -= 1
+        self._csr_dirty = True
+
+    # Bulk reads, one array operation per call instead of one lookup per id
+
+    def _indexes(self, node_ids: List[str]) -> np.ndarray:
+        return np.fromiter((-1 if (i := self._live_index(node_id)) is None else i for node_id in node_ids), dtype=np.int64, count=len(node_ids))
+
+    async def get_nodes(self, node_ids: List[str]) -> List[Optional[dict]]:
+        return [None if index < 0 else self._node_data[index] for index in self._indexes(node_ids).tolist()]
+
+    async def get_node_degrees(self, node_ids: List[str]) -> List[int]:
+        return self._node_degrees(node_ids).tolist()
+
+    async def get_edge_degrees(self, edge_pairs: List[Tuple[str, str]]) -> List[int]:
+        degrees = self._node_degrees([node_id for pair in edge_pairs for node_id in pair])
+        return (degrees[0::2] + degrees[1::2]).tolist()
+
+    async def get_edges(self, edge_pairs: List[Tuple[str, str]]) -> List[Optional[dict]]:
+        return [self._get_edge(src_id, tgt_id) for src_id, tgt_id in edge_pairs]
+
+    async def get_nodes_edges(self, node_ids: List[str]) -> List[Optional[List[Tuple[str, str]]]]:
+        indptr, indices, _ = self._csr()
+        results = []
+        for node_id, index in zip(node_ids, self._indexes(node_ids).tolist()):
+            if index < 0:
+                results.append(None)
+            else:
+                results.append([(node_id, self._ids[neighbor]) for neighbor in indices[indptr[index]:indptr[index + 1]].tolist()])
+        return results
+
+    async def get_node_neighbors(self, node_id: str) -> Set[str]:
+        index = self._live_index(node_id)
+        return set() if index is None else {self._ids[neighbor] for neighbor in self._neighbors(index).tolist()}
+
+    async def get_all_nodes(self) -> List[str]:
+        return [node_id for node_id, data in zip(self._ids, self._node_data) if data is not None]
+
+    async def get_all_edges(self) -> List[Tuple[str, str]]:
+        return [
+            (self._ids[src], self._ids[dst])
+            for src, dst, data in zip(self._edge_src, self._edge_dst, self._edge_data)
+            if data is not None
+        ]
+
+    # Bulk export and import, used by graph snapshots
+
+    async def iter_nodes(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[str, Dict[str, Any]]]]:
+        nodes = [(node_id, data) for node_id, data in zip(self._ids, self._node_data) if data is not None]
+        for i in range(0, len(nodes), batch_size):
+            yield nodes[i:i + batch_size]
+
+    async def iter_edges(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[str, str, Dict[str, Any]]]]:
+        edges = [
+            (self._ids[src], self._ids[dst], data)
+            for src, dst, data in zip(self._edge_src, self._edge_dst, self._edge_data)
+            if data is not None
+        ]
+        for i in range(0, len(edges), batch_size):
+            yield edges[i:i + batch_size]
+
+    async def upsert_nodes(self, nodes: List[Tuple[str, Dict[str, Any]]]) -> None:
+        for node_id, data in nodes:
+            self._upsert_node(node_id, data)
+
+    async def upsert_edges(self, edges: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        for src_id, tgt_id, data in edges:
+            self._upsert_edge(src_id, tgt_id, data)
+
+    # Snapshots
+
+    async def index_done_callback(self) -> None:
+        if not self._changed:
+            return
+        wait = self._last_snapshot + CSR_SNAPSHOT_INTERVAL - time.monotonic()
+        if wait <= 0:
+            await self.snapshot()
+        elif self._scheduled_snapshot is None or self._scheduled_snapshot.done():
+            # Throttled, so write the changes once the interval is up instead of waiting for the next insert
+            self._scheduled_snapshot = asyncio.ensure_future(self._snapshot_later(wait))
+
+    async def _snapshot_later(self, delay: float):
+        await asyncio.sleep(delay)
+        if self._changed:
+            await self.snapshot()
+
+    async def flush(self) -> None:
+        """Write changes a throttled snapshot has not covered yet; call before dropping the storage"""
+        if self._changed:
+            await self.snapshot()
+        if self._scheduled_snapshot is not None:
+            self._scheduled_snapshot.cancel()
+
+    async def snapshot(self) -> str:
+        """Write a new snapshot directory and point CURRENT at it once it is complete"""
+        async with self._snapshot_lock:
+            return await self._snapshot()
+
+    async def _snapshot(self) -> str:
+        indptr, indices, edge_ids = self._csr()
+        arrays = {
+            "indptr": np.array(indptr),
+            "indices": np.array(indices),
+            "edge_ids": np.array(edge_ids),
+            "edge_src": np.frombuffer(self._edge_src, dtype=np.int64).copy() if len(self._edge_src) else np.zeros(0, dtype=np.int64),
+            "edge_dst": np.frombuffer(self._edge_dst, dtype=np.int64).copy() if len(self._edge_dst) else np.zeros(0, dtype=np.int64),
+            "degree": self._degree[:len(self._ids)].copy(),
+        }
+        # Shallow copies are enough since writes replace attribute dicts; serializing happens in the thread
+        attributes = {"ids": list(self._ids), "nodes": list(self._node_data), "edges": list(self._edge_data)}
+        changes = self._changes
+        path = await asyncio.to_thread(self._write_snapshot, arrays, attributes)
+        # Only a written snapshot counts, so a failed write is retried on the next callback
+        self._saved_changes = changes
+        self._last_snapshot = time.monotonic()
+        logger.info(f"Wrote CSR graph snapshot with {len(self._ids)} nodes, {len(self._edge_index)} edges to {path}")
+        return path
+
+    def _write_snapshot(self, arrays: Dict[str, np.ndarray], attributes: Dict[str, list]) -> str:
+        os.makedirs(self._snapshot_root, exist_ok=True)
+        name = f"snapshot-{time.time_ns()}"
+        path = os.path.join(self._snapshot_root, name)
+        os.makedirs(path)
+        for key, values in arrays.items():
+            np.save(os.path.join(path, f"{key}.npy"), values)
+        with open(os.path.join(path, "attributes.json"), "w") as f:
+            json.dump(attributes, f)
+
+        current = os.path.join(self._snapshot_root, "CURRENT")
+        with open(current + ".tmp", "w") as f:
+            f.write(name)
+        os.replace(current + ".tmp", current)
+        for entry in os.listdir(self._snapshot_root):
+            if entry.startswith("snapshot-") and entry != name:
+                shutil.rmtree(os.path.join(self._snapshot_root, entry), ignore_errors=True)
+        return path
+
+    def _load_snapshot(self):
+        current = os.path.join(self._snapshot_root, "CURRENT")
+        if not os.path.exists(current):
+            return
+        with open(current) as f:
+            path = os.path.join(self._snapshot_root, f.read().strip())
+        arrays = {key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r") for key in SNAPSHOT_ARRAYS}
+        with open(os.path.join(path, "attributes.json")) as f:
+            attributes = json.load(f)
+
+        self._ids = attributes["ids"]
+        self._index = {node_id: index for index, node_id in enumerate(self._ids)}
+        self._node_data = attributes["nodes"]
+        self._edge_data = attributes["edges"]
+        self._edge_src = array("q", arrays["edge_src"].tobytes())
+        self._edge_dst = array("q", arrays["edge_dst"].tobytes())
+        self._edge_index = {
+            (src, dst): edge
+            for edge, (src, dst, data) in enumerate(zip(self._edge_src, self._edge_dst, self._edge_data))
+            if data is not None
+        }
+        self._degree = np.zeros(max(1024, 2 * len(self._ids)), dtype=np.int64)
+        self._degree[:len(self._ids)] = arrays["degree"]
+        # Read-only views of the mapped files, replaced by in-memory arrays on the next rebuild
+        self._indptr, self._indices, self._edge_ids = arrays["indptr"], arrays["indices"], arrays["edge_ids"]
+        logger.info(f"Loaded CSR graph snapshot {path} with {len(self._ids)} nodes, {len(self._edge_index)} edges")
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from lightrag import LightRAG
+
+from ..utils.logger import logger
+from ..utils.tracing import detached_context
+from .singleflight import SingleFlight
+
+PROJECT_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+MAX_PROJECT_INSTANCES = int(os.environ.get("MAX_PROJECT_INSTANCES", 32))
+PROJECT_IDLE_TTL = float(os.environ.get("PROJECT_IDLE_TTL", 900))
+
+
+def validate_project(project: str) -> str:
+    if not PROJECT_PATTERN.match(project):
+        raise HTTPException(status_code=400, detail=f"Invalid project name: {project}")
+    return project
+
+
+async def flush_rag(rag: LightRAG) -> None:
+    """Persist what file-backed storages, such as CSRGraphStorage, still hold only in memory"""
+    for name in ("full_docs", "text_chunks", "llm_response_cache", "entities_vdb", "relationships_vdb", "chunks_vdb", "chunk_entity_relation_graph"):
+        flush = getattr(getattr(rag, name, None), "flush", None)
+        if flush is not None:
+            await flush()
+
+
+class _Entry:
+    def __init__(self, rag: LightRAG):
+        self.rag = rag
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+class ProjectPool:
+    """
+    Lazily created LightRAG instances, one per project. Storages of every instance share the
+    process-wide database clients, so an instance is cheap to hold and cheap to drop. Instances
+    not in use are evicted least recently used first once there are more than max_instances,
+    or after idle_ttl seconds without a request. An evicted instance is flushed in the
+    background, and the project's next instance is only created once that flush is done.
+    """
+
+    def __init__(self, factory: Callable[[str], Awaitable[LightRAG]], max_instances: int = MAX_PROJECT_INSTANCES, idle_ttl: float = PROJECT_IDLE_TTL):
+        self.factory = factory
+        self.max_instances = max_instances
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Concurrent requests for a missing project share one creation, and a failed one is not cached
+        self._creating = SingleFlight()
+        self._closing: Dict[str, asyncio.Task] = {}
+
+    async def _create_entry(self, project: str) -> _Entry:
+        entry = self._entries.get(project)
+        if entry is None:
+            closing = self._closing.get(project)
+            if closing is not None:
+                await asyncio.shield(closing)
+            logger.info(f"Creating LightRAG instance for project {project}")
+            entry = _Entry(await self.factory(project))
+            self._entries[project] = entry
+        return entry
+
+    async def _reserve(self, project: str) -> _Entry:
+        """Mark the project's entry in use, creating it if needed"""
+        while True:
+            entry = self._entries.get(project)
+            if entry is not None:
+                # No await between the lookup and the reservation, so evict() cannot drop it in between
+                entry.in_use += 1
+                self._entries.move_to_end(project)
+                return entry
+            # Another request may evict the new entry before this one resumes; then look again
+            await self._creating.do(project, lambda: self._create_entry(project))
+
+    @asynccontextmanager
+    async def acquire(self, project: str):
+        """Yield the project's LightRAG instance, keeping it from eviction while in use"""
+        entry = await self._reserve(project)
+        try:
+            yield entry.rag
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            self.evict()
+
+    def evict(self) -> None:
+        now = time.monotonic()
+        for project, entry in list(self._entries.items()):
+            if entry.in_use:
+                continue
+            if len(self._entries) > self.max_instances or now - entry.last_used > self.idle_ttl:
+                logger.info(f"Evicting LightRAG instance for project {project}")
+                del self._entries[project]
+                self._closing[project] = asyncio.create_task(self._flush(project, entry), context=detached_context())
+
+    async def _flush(self, project: str, entry: _Entry) -> None:
+        try:
+            await flush_rag(entry.rag)
+        except Exception as e:
+            logger.error(f"Failed to flush LightRAG instance for project {project}: {str(e)}")
+        finally:
+            if self._closing.get(project) is asyncio.current_task():
+                del self._closing[project]
+
+    async def close(self) -> None:
+        """Flush and drop every instance, waiting for flushes of evicted ones too"""
+        entries = list(self._entries.items())
+        self._entries.clear()
+        await asyncio.gather(*self._closing.values(), *[self._flush(project, entry) for project, entry in entries])
+
+    def stats(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        return {
+            project: {"in_use": entry.in_use, "idle_seconds": round(now - entry.last_used, 1)}
+            for project, entry in self._entries.items()
+        }
+
+    def __contains__(self, project: Optional[str]) -> bool:
+        return project in self._entries
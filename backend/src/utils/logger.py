@@ -1,14 +1,45 @@
 from loguru import logger
-import traceback
+from collections import OrderedDict, deque
+import threading
 import requests
-import json
+import atexit
+import time
 import re
 import os
 
+SLACK_ALERT_BATCH_SECONDS = float(os.getenv("SLACK_ALERT_BATCH_SECONDS", 5))
+SLACK_ALERT_MAX_PER_MINUTE = int(os.getenv("SLACK_ALERT_MAX_PER_MINUTE", 6))
+SLACK_ALERT_MAX_PENDING = int(os.getenv("SLACK_ALERT_MAX_PENDING", 200))
+MAX_ALERTS_PER_MESSAGE = 10
+MAX_TRACEBACK_CHARS = 2500
+
 class ErrorLogger:
-    def __init__(self, notify="ALL"):
-        self.container = "analysis-backend"
-        self.notify = notify
+    """
+    Loguru sink that turns ERROR and CRITICAL records into batched Slack alerts.
+
+    It is registered with level="ERROR" and enqueue=True, so lower levels are dropped before
+    any formatting and the logging call only hands the record to loguru's queue. write() runs
+    on loguru's worker thread and only buffers; a separate thread posts one message per batch,
+    collapses repeats of the same error, and sends at most max_per_minute messages. Errors
+    that arrive while rate limited keep accumulating into the next batch.
+    """
+
+    def __init__(self, webhook_url, container="analysis-backend", batch_seconds=SLACK_ALERT_BATCH_SECONDS,
+                 max_per_minute=SLACK_ALERT_MAX_PER_MINUTE, max_pending=SLACK_ALERT_MAX_PENDING, start=True):
+        self.webhook_url = webhook_url
+        self.container = container
+        self.batch_seconds = batch_seconds
+        self.max_per_minute = max_per_minute
+        self.max_pending = max_pending
+        self._pending = OrderedDict()
+        self._dropped = 0
+        self._sent_at = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if start:
+            self._thread = threading.Thread(target=self._run, name="slack-alerts", daemon=True)
+            self._thread.start()
 
     def escape_slack_formatting(self, unescaped_message):
         escaped_message = re.sub(r'&', '&amp;', unescaped_message)
@@ -21,49 +52,105 @@ class ErrorLogger:
         return escaped_message
 
     def make_json_post_request(self, url, data):
-        headers = {
-            'Content-Type': 'application/json',
-        }
-        response = requests.post(url, data=json.dumps(data), headers=headers)
+        response = requests.post(url, json=data, timeout=10)
         return response.content
 
     def write(self, message):
+        record = message.record
+        exception = record["exception"]
+        error_type = exception.type.__name__ if exception and exception.type else record["level"].name
+        # Same call site and error type count as one alert, whatever values the message holds
+        key = (record["file"].path, record["line"], error_type)
+
+        with self._lock:
+            alert = self._pending.get(key)
+            if alert:
+                alert["count"] += 1
+                return
+            if len(self._pending) >= self.max_pending:
+                self._dropped += 1
+                return
+            # loguru appends the formatted exception to the message before it is queued
+            formatted = str(message)
+            traceback_text = formatted[len(record["message"]):].strip() if exception else ""
+            self._pending[key] = {
+                "count": 1,
+                "message": record["message"],
+                "path": record["file"].path,
+                "line": record["line"],
+                "traceback": traceback_text[-MAX_TRACEBACK_CHARS:],
+            }
+
+    def format_alert(self, alert):
+        repeated = f" (x{alert['count']})" if alert["count"] > 1 else ""
+        slack_msg = f'''{self.escape_slack_formatting(alert["message"])}{repeated}\n\n*Line {alert["line"]}*\n{alert["path"]}'''
+        if alert["traceback"]:
+            slack_msg += f'''\n\n*Traceback*\n```{self.escape_slack_formatting(alert["traceback"])}```'''
+        return slack_msg
+
+    def format_batch(self, alerts, dropped=0):
+        total = sum(alert["count"] for alert in alerts) + dropped
+        header = f"🛑 *Failure in {self.container}*" if total == 1 else f"🛑 *{total} failures in {self.container}*"
+        parts = [header] + [self.format_alert(alert) for alert in alerts[:MAX_ALERTS_PER_MESSAGE]]
+        hidden = len(alerts) - MAX_ALERTS_PER_MESSAGE
+        if hidden > 0:
+            parts.append(f"…and {hidden} more distinct errors")
+        if dropped:
+            parts.append(f"{dropped} errors dropped while the alert buffer was full")
+        return "\n\n".join(parts)
+
+    # Deliberately not called flush()/stop(): loguru calls those on a sink after every write and on remove
+    def send_pending(self, force=False):
+        """Post everything buffered as one message, unless the per-minute limit is used up"""
+        now = time.monotonic()
+        while self._sent_at and now - self._sent_at[0] >= 60:
+            self._sent_at.popleft()
+        if not force and len(self._sent_at) >= self.max_per_minute:
+            return False
 
-        # output Error details to console
-        # print(message)
+        with self._lock:
+            alerts = list(self._pending.values())
+            dropped = self._dropped
+            self._pending.clear()
+            self._dropped = 0
+        if not alerts and not dropped:
+            return False
 
+        self._sent_at.append(now)
         try:
-            js = json.loads(message)
-
-            # critical error
-            if(js['record']['level']['no'] >= 40):
-  
-                # print traceback to console
-                traceback.print_exc()
-
-                # send to slack
-                if self.notify == "ALL":
-
-                    line_number = js["record"]["line"]
-                    traceback_log = traceback.format_exc()
-
-                    # Extract line number from traceback log
-                    tb_lines = traceback_log.split("\n")
-                    for line in tb_lines:
-                        if line.startswith("  File"):
-                            line_number = line.split(",")[1].strip().replace("line ", "")
-                            break
-
-                    slack_msg = (f'''🛑 *Failure in {self.container}* \n{self.escape_slack_formatting(js["record"]["message"])}\n\n*Line {line_number}*\n{js["record"]["file"]["path"]}\n\n*Traceback*\n```{self.escape_slack_formatting(traceback.format_exc())}```''') # {js['record']['level']['icon']} {js['record']['level']['name']}
-                
-                    # bot channel
-                    self.make_json_post_request(str(os.getenv("SLACK_FAIL_BOT_WEBHOOK_URL")), {"text": slack_msg})
-        except:
-            print(message)
-            traceback.print_exc()
-            print("Error parsing ErrorLogger response")
-
-logger.add(ErrorLogger(notify=str(os.getenv("SLACK_FAIL_BOT_NOTIFY"))), serialize=True)
+            self.make_json_post_request(self.webhook_url, {"text": self.format_batch(alerts, dropped)})
+        except Exception as e:
+            # Not logged through loguru, which would feed the failure back into this sink
+            print(f"Failed to send Slack alert: {e}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.batch_seconds):
+            self.send_pending()
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.batch_seconds)
+        self.send_pending(force=True)
+
+def setup_error_alerts():
+    """Send errors to Slack when SLACK_FAIL_BOT_NOTIFY=ALL and a webhook is configured"""
+    webhook_url = os.getenv("SLACK_FAIL_BOT_WEBHOOK_URL")
+    if os.getenv("SLACK_FAIL_BOT_NOTIFY") != "ALL" or not webhook_url:
+        return None
+
+    error_logger = ErrorLogger(webhook_url)
+    handler_id = logger.add(error_logger, level="ERROR", enqueue=True, format="{message}", backtrace=False, diagnose=False)
+
+    def shutdown():
+        logger.remove(handler_id)  # drains loguru's queue into the sink
+        error_logger.close()
+
+    atexit.register(shutdown)
+    return error_logger
+
+setup_error_alerts()
 
 __all__ = ['logger']
 
@@ -74,4 +161,4 @@ __all__ = ['logger']
 # logger.success("Data processing completed successfully.")
 # logger.warning("Invalid configuration detected.")
 # logger.error("Failed to connect to the database.")
-# logger.critical("Unexpected system error occurred. Shutting down.")
\ No newline at end of file
+# logger.critical("Unexpected system error occurred. Shutting down.")
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from .logger import logger
+
+TRACE_EXPORT_PATH = os.environ.get("TRACE_EXPORT_PATH")
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 1.0))
+# Only export traces at least this slow, so production keeps just the interesting ones
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", 0))
+SERVICE_NAME = "graph-rag-backend"
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent", "start_ns", "end_ns", "attributes", "error", "children", "links")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.children: List["Span"] = []
+        # Roots of other traces this span waited on, such as a query shared with other requests
+        self.links: List["Span"] = []
+        if parent:
+            parent.children.append(self)
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def link(self, other: "Span") -> None:
+        self.links.append(other)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def walk(self) -> Iterator["Span"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_tree(self) -> dict:
+        """Nested, human-readable view of the span and its descendants; open spans report time so far"""
+        tree = {
+            "name": self.name,
+            "duration_ms": round(self.duration_ms, 3),
+            "offset_ms": round((self.start_ns - self.root().start_ns) / 1e6, 3),
+        }
+        if self.attributes:
+            tree["attributes"] = self.attributes
+        if self.error:
+            tree["error"] = self.error
+        if self.children:
+            tree["children"] = [child.to_tree() for child in self.children]
+        if self.links:
+            tree["links"] = [link.to_tree() for link in self.links]
+        return tree
+
+    def root(self) -> "Span":
+        span = self
+        while span.parent:
+            span = span.parent
+        return span
+
+    def to_otlp(self) -> dict:
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 2 if self.parent is None else 1,  # SERVER for the request, INTERNAL below it
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns if self.end_ns is not None else time.time_ns()),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent:
+            otlp["parentSpanId"] = self.parent.span_id
+        if self.links:
+            otlp["links"] = [{"traceId": link.trace_id, "spanId": link.span_id} for link in self.links]
+        return otlp
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_tree() -> Optional[dict]:
+    """Span tree of the trace the caller is running in, for returning with debug responses"""
+    current = _current.get()
+    return current.root().to_tree() if current else None
+
+
+def detached_context() -> Context:
+    """
+    Copy of the current context without the current span, for tasks that can outlive the request
+    that started them. Their spans would otherwise hang off a trace that is already exported.
+    """
+    context = copy_context()
+    context.run(_current.set, None)
+    return context
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Child span of the current span. Outside a trace this yields None and records nothing,
+    so instrumented code costs next to nothing when no request is being traced.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Async generators closed from another task finish in a different context
+            _current.set(parent)
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Span]:
+    """Root span for one unit of work, such as an HTTP request"""
+    root = Span(name, None, attributes)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        root.end_ns = time.time_ns()
+        _current.reset(token)
+
+
+class JsonFileExporter:
+    """
+    Appends each trace as one line of OTLP/JSON (an ExportTraceServiceRequest), the format the
+    OpenTelemetry Collector's otlpjsonfile receiver reads, so traces can be loaded into Jaeger,
+    Tempo or any other OTLP backend later.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, root: Span) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "graph_rag"},
+                    "spans": [s.to_otlp() for s in root.walk()],
+                }],
+            }]
+        }
+        line = json.dumps(payload, default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+_exporter: Optional[JsonFileExporter] = JsonFileExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH else None
+
+
+def set_exporter(exporter: Optional[JsonFileExporter]) -> None:
+    global _exporter
+    _exporter = exporter
+
+
+async def export_trace(root: Span) -> None:
+    """Write a finished trace off the event loop, subject to sampling and the slow-trace threshold"""
+    if _exporter is None or root.duration_ms < TRACE_SLOW_MS or random.random() >= TRACE_SAMPLE_RATE:
+        return
+    try:
+        await asyncio.to_thread(_exporter.export, root)
+    except Exception as e:
+        logger.warning(f"Failed to export trace {root.trace_id}: {str(e)}")
+
+
+async def tracing_middleware(request, call_next):
+    """Open a root span per HTTP request and return its id in the X-Trace-Id header"""
+    with start_trace(f"{request.method} {request.url.path}", **{"http.method": request.method, "http.target": request.url.path}) as root:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            root.name = f"{request.method} {route.path}"
+        root.set("http.status_code", response.status_code)
+        response.headers["X-Trace-Id"] = root.trace_id
+    # call_next returns once the headers are ready; streaming routes keep adding spans while the body is sent
+    response.body_iterator = _end_after_body(response.body_iterator, root)
+    return response
+
+
+async def _end_after_body(body: AsyncIterator[bytes], root: Span) -> AsyncIterator[bytes]:
+    """Pass the response body through, then end the root span and export the trace"""
+    try:
+        async for chunk in body:
+            yield chunk
+    except BaseException as e:
+        root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        root.end_ns = time.time_ns()
+        await export_trace(root)
@@ -0,0 +1,78 @@
+import pytest
+from src.graph_rag.cache import AnswerCache
+from src.graph_rag.services import GraphRAGService
+
+
+class CountingRAG:
+    def __init__(self):
+        self.calls = 0
+
+    async def aquery(self, query, param):
+        self.calls += 1
+        return f"answer {self.calls} ({param.mode})"
+
+
+@pytest.mark.asyncio
+async def test_answer_cache_normalizes_and_invalidates():
+    cache = AnswerCache()
+    await cache.set("What is  Glioma?", "hybrid", {}, "a brain tumour")
+
+    assert await cache.get("what is glioma?", "hybrid", {}) == "a brain tumour"
+    assert await cache.get("what is glioma?", "local", {}) is None
+
+    await cache.bump_version()
+    assert await cache.get("what is glioma?", "hybrid", {}) is None
+
+
+@pytest.mark.asyncio
+async def test_answer_cache_bounds_and_ttl(monkeypatch):
+    cache = AnswerCache(max_entries=2, ttl=10)
+    now = [100.0]
+    monkeypatch.setattr("src.graph_rag.cache.time.monotonic", lambda: now[0])
+
+    for query in ["a", "b", "c"]:
+        await cache.set(query, "naive", {}, query.upper())
+    assert await cache.get("a", "naive", {}) is None
+    assert await cache.get("c", "naive", {}) == "C"
+
+    now[0] += 11
+    assert await cache.get("c", "naive", {}) is None
+
+
+@pytest.mark.asyncio
+async def test_run_query_uses_answer_cache():
+    service = GraphRAGService()
+    service.rag = CountingRAG()
+
+    first = await service.run_query_with_status("What is glioma?", method="local")
+    second = await service.run_query_with_status("what is  glioma?", method="local")
+
+    assert first == ("answer 1 (local)", "MISS")
+    assert second == ("answer 1 (local)", "HIT")
+    assert service.rag.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_answer_computed_during_ingest_is_not_served_after_it():
+    service = GraphRAGService()
+    service.answer_cache = AnswerCache()
+
+    class IngestDuringQueryRAG(CountingRAG):
+        async def aquery(self, query, param):
+            await service.answer_cache.bump_version()
+            return await super().aquery(query, param)
+
+    service.rag = IngestDuringQueryRAG()
+    first = await service.run_query_with_status("What is glioma?", method="local")
+    second = await service.run_query_with_status("What is glioma?", method="local")
+
+    assert first[1] == "MISS" and second[1] == "MISS"
+    assert service.rag.calls == 2
+
+
+def test_memory_fallback_is_off_with_several_workers(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert not AnswerCache.from_env().memory_fallback
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert AnswerCache.from_env().memory_fallback
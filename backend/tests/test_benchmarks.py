@@ -0,0 +1,38 @@
+import pytest
+from lightrag.prompt import PROMPTS
+from benchmarks.fakes import BENCH_STORAGE, FakeLLM, fake_embedding_func
+from src.graph_rag.services import GraphRAGService
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_answers_lightrag_prompts():
+    llm = FakeLLM()
+    prompt = PROMPTS["entity_extraction"].format(
+        language="English", entity_types="category", examples="",
+        tuple_delimiter="<|>", record_delimiter="##", completion_delimiter="<|COMPLETE|>",
+        input_text="EGFR amplification is common in Glioblastoma treated with Temozolomide.",
+    )
+
+    extraction = await llm(prompt)
+    keywords = await llm("Query: How does EGFR relate to Temozolomide?\n", keyword_extraction=True)
+
+    assert extraction.count('("entity"') == 3 and extraction.count('("relationship"') == 2
+    assert extraction.endswith("<|COMPLETE|>")
+    assert '"low_level_keywords": ["How", "EGFR", "Temozolomide"]' in keywords
+    assert (await fake_embedding_func()(["EGFR", "EGFR"])).shape == (2, 64)
+
+
+@pytest.mark.asyncio
+async def test_service_accepts_local_storages_and_models(tmp_path):
+    service = GraphRAGService(
+        base_path=str(tmp_path / "data"),
+        working_dir=str(tmp_path / "rag"),
+        storage=BENCH_STORAGE,
+        llm_model_func=FakeLLM(),
+        embedding_func=fake_embedding_func(),
+    )
+    await service.setup_directories()
+
+    assert type(service.rag.chunk_entity_relation_graph).__name__ == "BenchGraphStorage"
+    assert type(service.rag.full_docs).__name__ == "BenchKVStorage"
+    assert await service.rag.full_docs.filter_keys(["doc-1"]) == {"doc-1"}
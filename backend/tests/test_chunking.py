@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+import pytest
+import tiktoken
+from lightrag.operate import chunking_by_token_size
+from src.graph_rag.chunking import chunk_documents
+
+
+@pytest.mark.asyncio
+async def test_chunk_documents_matches_lightrag_chunking():
+    try:
+        tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception:
+        pytest.skip("tiktoken encoding is not available offline")
+
+    rag = SimpleNamespace(chunk_token_size=64, chunk_overlap_token_size=8, tiktoken_model_name="gpt-4o-mini")
+    content = " ".join(f"Tumour sample {i} shows elevated microRNA expression." for i in range(100))
+    docs = {"doc-a": {"content": content}, "doc-b": {"content": "A short note on gliomas."}}
+
+    chunks = await chunk_documents(rag, docs)
+
+    expected = chunking_by_token_size(content, overlap_token_size=8, max_token_size=64, tiktoken_model="gpt-4o-mini")
+    doc_a_chunks = sorted(
+        (chunk for chunk in chunks.values() if chunk["full_doc_id"] == "doc-a"),
+        key=lambda chunk: chunk["chunk_order_index"],
+    )
+    assert [chunk["content"] for chunk in doc_a_chunks] == [dp["content"] for dp in expected]
+    assert [chunk["content"] for chunk in chunks.values() if chunk["full_doc_id"] == "doc-b"] == ["A short note on gliomas."]
+    assert all(key.startswith("chunk-") for key in chunks)
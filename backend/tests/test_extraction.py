@@ -0,0 +1,87 @@
+import os
+import httpx
+import pytest
+from tenacity import RetryError, stop_after_attempt
+from src.graph_rag.extraction import detect_kind, download_to_disk, iter_sections, iter_text
+
+
+def make_pdf(path, pages):
+    """Write a minimal PDF with one line of text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    path.write_bytes(body)
+
+
+def test_detect_kind():
+    assert detect_kind("application/pdf", "report.bin") == "pdf"
+    assert detect_kind("text/html; charset=utf-8") == "html"
+    assert detect_kind(None, "notes/paper.PDF") == "pdf"
+    assert detect_kind(None, "letter.docx") == "docx"
+    assert detect_kind("text/plain", "notes.txt") == "text"
+    assert detect_kind(None, None) == "text"
+
+
+@pytest.mark.asyncio
+async def test_iter_sections_splits_on_lines(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1000)))
+
+    sections = [section async for section in iter_sections(path, "text", section_chars=500)]
+
+    assert len(sections) > 1
+    assert all(len(section) <= 500 for section in sections)
+    assert "".join(sections) == path.read_text()
+
+
+@pytest.mark.asyncio
+async def test_iter_text_html(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("<html><head><script>var x = 1;</script></head><body><p>Glioma</p></body></html>")
+
+    text = "".join([segment async for segment in iter_text(path, "html")])
+
+    assert "Glioma" in text
+    assert "var x" not in text
+
+
+@pytest.mark.asyncio
+async def test_iter_text_pdf_keeps_page_order(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.graph_rag.extraction.PDF_PAGES_PER_TASK", 2)
+    path = tmp_path / "paper.pdf"
+    make_pdf(path, [f"Page{i}" for i in range(5)])
+
+    segments = [segment async for segment in iter_text(path, "pdf")]
+
+    assert len(segments) == 3
+    text = "".join(segments)
+    assert [text.index(f"Page{i}") for i in range(5)] == sorted(text.index(f"Page{i}") for i in range(5))
+
+
+@pytest.mark.asyncio
+async def test_failed_download_leaves_no_file_or_descriptor(tmp_path):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    open_fds = len(os.listdir("/proc/self/fd"))
+
+    with pytest.raises(RetryError):
+        await download_to_disk.retry_with(stop=stop_after_attempt(1))(client, "https://blob.example/doc.pdf", str(tmp_path))
+
+    assert list(tmp_path.iterdir()) == []
+    assert len(os.listdir("/proc/self/fd")) == open_fds
+    await client.aclose()
@@ -6,7 +6,7 @@ from src.graph_rag.models import PutBlobResult
 import tempfile
 from pathlib import Path
 import shutil
-from main import startup_event
+from main import app, lifespan
 import os
 
 @pytest.fixture
@@ -67,8 +67,9 @@ async def test_run_query_without_init():
 async def test_startup_event():
 
     
-    # Execute the startup event
-    await startup_event()
+    # Run the app lifespan startup
+    async with lifespan(app):
+        assert app.state.graph_rag_service.ready
     
     # Verify the directories were created
     service = GraphRAGService()
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import pytest
+from fastapi.testclient import TestClient
+import main
+from src.graph_rag.models import UploadJob
+from src.graph_rag.services import GraphRAGService
+
+
+def test_ready_reports_503_until_warm_up(monkeypatch):
+    service = GraphRAGService()
+    monkeypatch.setattr(main.app.state, "graph_rag_service", service, raising=False)
+    client = TestClient(main.app)
+
+    assert client.get("/api/v1/ready").status_code == 503
+    service.ready = True
+    assert client.get("/api/v1/ready").json() == {"status": "ready"}
+
+
+def test_routes_503_without_service(monkeypatch):
+    monkeypatch.delattr(main.app.state, "graph_rag_service", raising=False)
+    assert TestClient(main.app).get("/api/v1/scheduler").status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_jobs_then_cancels_stragglers():
+    service = GraphRAGService()
+    service.ready = True
+    finished = UploadJob(job_id="fast", filename="a.txt", status="running")
+    stuck = UploadJob(job_id="slow", filename="b.txt", status="running")
+    service.jobs = {"fast": finished, "slow": stuck}
+
+    async def work(job, seconds):
+        await asyncio.sleep(seconds)
+        job.status = "done"
+
+    service._job_tasks = {
+        "fast": asyncio.create_task(work(finished, 0.01)),
+        "slow": asyncio.create_task(work(stuck, 10)),
+    }
+
+    await service.drain(timeout=0.2)
+
+    assert not service.ready
+    assert (finished.status, stuck.status) == ("done", "failed")
+    assert stuck.error == "Interrupted by shutdown"
+
+
+@pytest.mark.asyncio
+async def test_lifespan_closes_the_service_when_warm_up_fails(monkeypatch):
+    closed = []
+
+    async def failing_start(self):
+        raise ConnectionError("neo4j unavailable")
+
+    async def close(self):
+        closed.append(self)
+
+    monkeypatch.setattr(GraphRAGService, "start", failing_start)
+    monkeypatch.setattr(GraphRAGService, "close", close)
+
+    with pytest.raises(ConnectionError):
+        async with main.lifespan(main.app):
+            pass
+    assert len(closed) == 1
+
+
+@pytest.mark.asyncio
+async def test_lifespan_drops_the_workers_live_gauges(monkeypatch, tmp_path):
+    async def noop(self, *args, **kwargs):
+        pass
+
+    for name in ("start", "drain", "close"):
+        monkeypatch.setattr(GraphRAGService, name, noop)
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    live = tmp_path / f"gauge_livesum_{os.getpid()}.db"
+    live.write_bytes(b"")
+    other = tmp_path / "gauge_livesum_1.db"
+    other.write_bytes(b"")
+
+    async with main.lifespan(main.app):
+        assert live.exists()
+
+    assert not live.exists() and other.exists()
@@ -0,0 +1,87 @@
+import asyncio
+import numpy as np
+import pytest
+from src.graph_rag.local_embedding import LocalEmbeddingServer
+
+
+class FakeModel:
+    max_seq_length = 256
+
+    def __init__(self):
+        self.batches = []
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size, convert_to_numpy):
+        self.batches.append(list(texts))
+        return np.array([[len(text), i] for i, text in enumerate(texts)], dtype=float)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_a_batch():
+    model = FakeModel()
+    server = LocalEmbeddingServer("fake", max_batch_size=8, max_wait_ms=20, model=model)
+    await server.start()
+    try:
+        results = await asyncio.gather(
+            server.embed(["a", "bb"]),
+            server.embed(["ccc"]),
+            server.embed(["dddd", "e"]),
+        )
+    finally:
+        await server.stop()
+
+    assert model.batches == [["a", "bb", "ccc", "dddd", "e"]]
+    assert [r[:, 0].tolist() for r in results] == [[1, 2], [3], [4, 1]]
+    stats = server.stats()
+    assert (stats["requests"], stats["batches"], stats["texts"]) == (3, 1, 5)
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped_at_max_batch_size():
+    model = FakeModel()
+    server = LocalEmbeddingServer("fake", max_batch_size=2, max_wait_ms=20, model=model)
+    await server.start()
+    try:
+        await asyncio.gather(*[server.embed([str(i)]) for i in range(5)])
+        func = server.embedding_func()
+    finally:
+        await server.stop()
+
+    assert [len(batch) for batch in model.batches] == [2, 2, 1]
+    assert (func.embedding_dim, func.max_token_size) == (2, 256)
+
+
+@pytest.mark.asyncio
+async def test_requests_that_would_overflow_a_batch_start_the_next_one():
+    model = FakeModel()
+    server = LocalEmbeddingServer("fake", max_batch_size=4, max_wait_ms=20, model=model)
+    await server.start()
+    try:
+        results = await asyncio.gather(
+            server.embed(["a", "b", "c"]),
+            server.embed(["d", "e"]),
+            server.embed(["f", "g", "h", "i", "j"]),
+        )
+    finally:
+        await server.stop()
+
+    assert model.batches == [["a", "b", "c"], ["d", "e"], ["f", "g", "h", "i", "j"]]
+    assert [len(r) for r in results] == [3, 2, 5]
+
+
+@pytest.mark.asyncio
+async def test_server_can_be_restarted():
+    model = FakeModel()
+    server = LocalEmbeddingServer("fake", max_wait_ms=1, model=model)
+    await server.start()
+    await server.stop()
+    with pytest.raises(RuntimeError):
+        await server.embed(["a"])
+
+    await server.start()
+    try:
+        assert (await server.embed(["a"])).shape == (1, 2)
+    finally:
+        await server.stop()
@@ -0,0 +1,53 @@
+from loguru import logger
+from src.utils.logger import ErrorLogger
+
+
+class RecordingErrorLogger(ErrorLogger):
+    def __init__(self, **kwargs):
+        super().__init__("https://hooks.example/test", start=False, **kwargs)
+        self.posts = []
+
+    def make_json_post_request(self, url, data):
+        self.posts.append(data["text"])
+
+
+def log_errors(sink, count):
+    handler_id = logger.add(sink, level="ERROR", enqueue=True, format="{message}", backtrace=False, diagnose=False)
+    try:
+        logger.info("not an alert")
+        for i in range(count):
+            try:
+                raise ValueError(f"bad chunk {i}")
+            except ValueError:
+                logger.exception(f"Insert failed for chunk {i}")
+        logger.complete()
+    finally:
+        logger.remove(handler_id)
+
+
+def test_repeated_errors_are_batched_into_one_alert():
+    sink = RecordingErrorLogger()
+    log_errors(sink, 25)
+
+    assert sink.send_pending()
+    assert len(sink.posts) == 1
+    post = sink.posts[0]
+    assert post.startswith("🛑 *25 failures in analysis-backend*")
+    assert "Insert failed for chunk 0 (x25)" in post
+    assert "ValueError: bad chunk 0" in post
+    assert not sink.send_pending()
+
+
+def test_alerts_are_rate_limited_and_bounded():
+    sink = RecordingErrorLogger(max_per_minute=1, max_pending=1)
+    log_errors(sink, 1)
+    assert sink.send_pending()
+
+    log_errors(sink, 1)
+    handler_id = logger.add(sink, level="ERROR", format="{message}")
+    logger.error("A different failure")
+    logger.remove(handler_id)
+    assert not sink.send_pending()
+
+    assert sink.send_pending(force=True)
+    assert "1 errors dropped" in sink.posts[-1]
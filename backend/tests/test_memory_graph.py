@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import pytest
+from lightrag.storage import NetworkXStorage
+from src.graph_rag.storage import memory_graph
+from src.graph_rag.storage.memory_graph import CSRGraphStorage
+
+
+def make_storage(path, cls=CSRGraphStorage):
+    return cls(namespace="chunk_entity_relation", global_config={"working_dir": str(path)}, embedding_func=None)
+
+
+async def build(storage):
+    await storage.upsert_node("A", {"entity_type": "PERSON"})
+    await storage.upsert_edge("A", "B", {"weight": 1.0})
+    await storage.upsert_edge("B", "C", {"weight": 2.0})
+    await storage.upsert_edge("C", "A", {"weight": 3.0})
+    await storage.upsert_edge("C", "D", {"weight": 4.0})
+    await storage.upsert_edge("A", "B", {"description": "merged"})
+
+
+@pytest.mark.asyncio
+async def test_matches_networkx_storage(tmp_path):
+    csr = make_storage(tmp_path / "csr")
+    reference = make_storage(tmp_path / "nx", NetworkXStorage)
+    for storage in (csr, reference):
+        await build(storage)
+
+    for node in ["A", "B", "C", "D", "missing"]:
+        assert await csr.has_node(node) == await reference.has_node(node)
+        assert await csr.get_node(node) == await reference.get_node(node)
+        if node != "missing":  # networkx returns an empty DegreeView rather than 0 here
+            assert await csr.node_degree(node) == await reference.node_degree(node)
+        csr_edges, reference_edges = await csr.get_node_edges(node), await reference.get_node_edges(node)
+        assert (csr_edges is None) == (reference_edges is None)
+        assert sorted(csr_edges or []) == sorted(reference_edges or [])
+    for src, tgt in [("A", "B"), ("B", "A"), ("A", "D"), ("C", "D")]:
+        assert await csr.has_edge(src, tgt) == await reference.has_edge(src, tgt)
+        assert await csr.get_edge(src, tgt) == await reference.get_edge(src, tgt)
+        assert await csr.edge_degree(src, tgt) == await reference.edge_degree(src, tgt)
+
+
+@pytest.mark.asyncio
+async def test_delete_node_removes_its_edges(tmp_path):
+    storage = make_storage(tmp_path)
+    await build(storage)
+
+    await storage.delete_node("C")
+
+    assert not await storage.has_node("C")
+    assert not await storage.has_edge("B", "C")
+    assert await storage.node_degree("D") == 0
+    assert await storage.node_degree("A") == 1
+    assert await storage.get_node_edges("A") == [("A", "B")]
+    assert sorted(await storage.get_all_edges()) == [("A", "B")]
+
+    await storage.upsert_edge("C", "A", {})
+    assert await storage.get_node_neighbors("A") == {"B", "C"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_reads(tmp_path):
+    storage = make_storage(tmp_path)
+    await build(storage)
+
+    assert await storage.get_node_degrees(["A", "missing", "D"]) == [2, 0, 1]
+    assert await storage.get_edge_degrees([("A", "B"), ("C", "D")]) == [4, 4]
+    assert await storage.get_nodes(["A", "missing"]) == [{"entity_type": "PERSON"}, None]
+    assert await storage.get_edges([("B", "A"), ("A", "D")]) == [{"weight": 1.0, "description": "merged"}, None]
+    edges = await storage.get_nodes_edges(["D", "missing"])
+    assert edges == [[("D", "C")], None]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_round_trip(tmp_path):
+    storage = make_storage(tmp_path)
+    await build(storage)
+    await storage.delete_edge("C", "D")
+    await storage.index_done_callback()
+
+    restored = make_storage(tmp_path)
+
+    assert sorted(await restored.get_all_nodes()) == ["A", "B", "C", "D"]
+    assert sorted(await restored.get_node_edges("C")) == [("C", "A"), ("C", "B")]
+    assert await restored.node_degree("D") == 0
+    assert await restored.get_edge("A", "B") == {"weight": 1.0, "description": "merged"}
+
+    # Writes after a restart go to memory and replace the mapped arrays on the next read
+    await restored.upsert_edge("D", "E", {})
+    assert await restored.get_node_edges("D") == [("D", "E")]
+    await restored.index_done_callback()
+    assert len([entry for entry in (tmp_path / "graph_chunk_entity_relation.csr").iterdir() if entry.name.startswith("snapshot-")]) == 1
+
+
+@pytest.mark.asyncio
+async def test_isolated_nodes_have_no_edges(tmp_path):
+    storage = make_storage(tmp_path)
+    await storage.upsert_node("A", {})
+    assert await storage.get_node_edges("A") == []
+
+    await storage.upsert_edge("A", "B", {})
+    assert await storage.get_node_edges("A") == [("A", "B")]
+    await storage.upsert_node("C", {})
+    assert await storage.get_node_edges("C") == []
+    assert await storage.get_nodes_edges(["C", "B"]) == [[], [("B", "A")]]
+    await storage.index_done_callback()
+
+    restored = make_storage(tmp_path)
+    await restored.upsert_node("D", {})
+    assert await restored.get_node_edges("D") == []
+    assert await restored.get_node_neighbors("D") == set()
+
+
+@pytest.mark.asyncio
+async def test_throttled_changes_are_written_on_flush_and_failed_writes_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.graph_rag.storage.memory_graph.CSR_SNAPSHOT_INTERVAL", 3600)
+    storage = make_storage(tmp_path)
+    await storage.upsert_edge("A", "B", {})
+    await storage.index_done_callback()
+    await storage.upsert_edge("B", "C", {})
+    await storage.index_done_callback()
+    assert not storage._scheduled_snapshot.done()
+
+    await storage.flush()
+    assert sorted(await make_storage(tmp_path).get_all_nodes()) == ["A", "B", "C"]
+
+    def failing_write(arrays, attributes):
+        raise OSError("disk full")
+
+    await storage.upsert_node("D", {})
+    monkeypatch.setattr(storage, "_write_snapshot", failing_write)
+    with pytest.raises(OSError):
+        await storage.flush()
+    monkeypatch.undo()
+    await storage.flush()
+    assert "D" in await make_storage(tmp_path).get_all_nodes()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_written_off_the_loop_from_a_copy(tmp_path, monkeypatch):
+    storage = make_storage(tmp_path)
+    await storage.upsert_node("A", {"description": "before"})
+    started, release = asyncio.Event(), threading.Event()
+    write = storage._write_snapshot
+    loop = asyncio.get_running_loop()
+
+    def slow_write(arrays, attributes):
+        loop.call_soon_threadsafe(started.set)
+        release.wait(5)
+        return write(arrays, attributes)
+
+    serialized_on = []
+    dump, dumps = memory_graph.json.dump, memory_graph.json.dumps
+
+    def recording(serialize):
+        def wrapped(*args, **kwargs):
+            serialized_on.append(threading.current_thread())
+            return serialize(*args, **kwargs)
+        return wrapped
+
+    monkeypatch.setattr(storage, "_write_snapshot", slow_write)
+    monkeypatch.setattr(memory_graph.json, "dump", recording(dump))
+    monkeypatch.setattr(memory_graph.json, "dumps", recording(dumps))
+    snapshot = asyncio.create_task(storage.snapshot())
+    await started.wait()
+    # The loop is free while the snapshot is written, and later writes do not leak into it
+    await storage.upsert_node("A", {"description": "after"})
+    release.set()
+    await snapshot
+    monkeypatch.undo()
+
+    assert serialized_on and threading.main_thread() not in serialized_on
+    assert await make_storage(tmp_path).get_node("A") == {"description": "before"}
+    assert storage._changed
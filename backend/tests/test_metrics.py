@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+import main
+from src.graph_rag.dependencies import get_graph_rag_service
+from src.graph_rag.metrics import instrument_storage, sample_periodically
+from src.graph_rag.models import UploadJob
+from src.graph_rag.services import GraphRAGService
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_instrument_storage_times_public_async_methods():
+    @instrument_storage("fake")
+    class FakeStorage:
+        async def get_node(self, node_id):
+            if node_id is None:
+                raise KeyError(node_id)
+            return {"id": node_id}
+
+        async def _private(self):
+            return None
+
+    storage = FakeStorage()
+    before = sample("graphrag_storage_seconds_count", backend="fake", method="get_node")
+
+    assert await storage.get_node("EGFR") == {"id": "EGFR"}
+    with pytest.raises(KeyError):
+        await storage.get_node(None)
+
+    assert sample("graphrag_storage_seconds_count", backend="fake", method="get_node") == before + 2
+    assert sample("graphrag_storage_errors_total", backend="fake", method="get_node") == 1
+    assert sample("graphrag_storage_seconds_count", backend="fake", method="_private") == 0
+
+
+def test_metrics_route_reports_stages_and_cache_lookups(monkeypatch):
+    class FakeRAG:
+        async def aquery(self, query, param):
+            return "An answer"
+
+    service = GraphRAGService()
+    service.rag = FakeRAG()
+    monkeypatch.setitem(main.app.dependency_overrides, get_graph_rag_service, lambda: service)
+    client = TestClient(main.app)
+    hits = sample("graphrag_answer_cache_lookups_total", result="hit")
+
+    client.get("/api/v1/search", params={"q": "glioma grading", "method": "naive"})
+    client.get("/api/v1/search", params={"q": "glioma grading", "method": "naive"})
+    response = client.get("/api/v1/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'graphrag_stage_seconds_count{pipeline="query",stage="aquery_naive"}' in response.text
+    assert 'graphrag_queue_depth{queue="llm_bulk"} 0.0' in response.text
+    assert sample("graphrag_answer_cache_lookups_total", result="hit") == hits + 1
+    assert sample("graphrag_http_request_seconds_count", method="GET", route="/api/v1/search", status="200") >= 2
+
+
+@pytest.mark.asyncio
+async def test_each_worker_samples_its_gauges_periodically():
+    service = GraphRAGService()
+    sampler = asyncio.create_task(sample_periodically(service, interval=0.01))
+    try:
+        service.jobs["job"] = UploadJob(job_id="job", filename="a.txt", status="running")
+        await asyncio.sleep(0.05)
+        assert sample("graphrag_in_flight", kind="upload_jobs") == 1
+    finally:
+        sampler.cancel()
@@ -0,0 +1,42 @@
+import pytest
+from src.graph_rag.mode_router import QueryModeRouter
+from src.graph_rag.services import GraphRAGService
+
+
+@pytest.mark.parametrize("query, mode", [
+    ("glioblastoma survival", "naive"),
+    ('"temozolomide"', "naive"),
+    ("What is EGFR?", "local"),
+    ("Which trials studied IDH1 mutations?", "local"),
+    ("What are the main themes in this corpus?", "global"),
+    ("Compare how EGFR and IDH1 relate to overall survival", "hybrid"),
+    ("What is the main side effect of temozolomide?", "local"),
+    ("What are common complications after glioma resection?", "local"),
+    ("What are the recurring findings across these studies?", "global"),
+])
+def test_route_picks_cheapest_adequate_mode(query, mode):
+    assert QueryModeRouter().route(query).mode == mode
+
+
+def test_report_tracks_latency_and_failures():
+    router = QueryModeRouter()
+    router.record("local", 0.2, "An answer", routed=True)
+    router.record("local", 0.4, "Sorry, I'm not able to provide an answer to that question.")
+
+    report = router.report()["local"]
+
+    assert (report["queries"], report["auto_routed"], report["fail_rate"]) == (2, 1, 0.5)
+    assert report["p50_ms"] == 400.0
+
+
+@pytest.mark.asyncio
+async def test_auto_method_routes_query():
+    class RecordingRAG:
+        async def aquery(self, query, param):
+            return param.mode
+
+    service = GraphRAGService()
+    service.rag = RecordingRAG()
+
+    assert await service.run_query("What is EGFR?", method="auto") == "local"
+    assert service.mode_router.report()["local"]["auto_routed"] == 1
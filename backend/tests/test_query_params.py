@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+import main
+from src.graph_rag.dependencies import get_graph_rag_service
+from src.graph_rag.models import RetrievalOptions
+from lightrag.utils import EmbeddingFunc
+from src.graph_rag.query_params import build_query_param
+from src.graph_rag.services import GraphRAGService
+
+
+def test_build_query_param_applies_options():
+    param = build_query_param("local", "Bullet Points", RetrievalOptions(top_k=10, max_token_for_text_unit=1500, only_need_context=True))
+
+    assert (param.mode, param.response_type, param.top_k) == ("local", "Bullet Points", 10)
+    assert param.max_token_for_text_unit == 1500
+    assert param.max_token_for_global_context == 4000
+    assert param.only_need_context
+
+
+def test_latency_budget_trims_retrieval():
+    generous = build_query_param("hybrid", "Multiple Paragraphs", RetrievalOptions(latency_budget_ms=60000))
+    tight = build_query_param("hybrid", "Multiple Paragraphs", RetrievalOptions(latency_budget_ms=5000))
+    tightest = build_query_param("hybrid", "Multiple Paragraphs", RetrievalOptions(latency_budget_ms=500))
+
+    assert (generous.mode, generous.top_k, generous.max_token_for_local_context) == ("hybrid", 60, 4000)
+    assert (tight.mode, tight.top_k, tight.max_token_for_local_context) == ("hybrid", 15, 1000)
+    assert (tightest.mode, tightest.top_k, tightest.max_token_for_local_context) == ("local", 6, 500)
+
+
+def test_search_route_passes_retrieval_options(monkeypatch):
+    seen = []
+
+    class RecordingRAG:
+        async def aquery(self, query, param):
+            seen.append(param)
+            return "context only"
+
+    service = GraphRAGService()
+    service.rag = RecordingRAG()
+    monkeypatch.setitem(main.app.dependency_overrides, get_graph_rag_service, lambda: service)
+    client = TestClient(main.app)
+
+    response = client.get("/api/v1/search", params={"q": "glioma", "method": "naive", "top_k": 7, "only_need_context": "true"})
+
+    assert response.json() == {"result": "context only"}
+    assert (seen[0].mode, seen[0].top_k, seen[0].only_need_context) == ("naive", 7, True)
+    assert client.get("/api/v1/search", params={"q": "glioma", "top_k": 0}).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_latency_budget_is_enforced():
+    class SlowRAG:
+        async def aquery(self, query, param):
+            await asyncio.sleep(1)
+            return "too late"
+
+    service = GraphRAGService()
+    service.rag = SlowRAG()
+    options = RetrievalOptions(latency_budget_ms=100)
+
+    with pytest.raises(HTTPException) as error:
+        await service.run_query_with_status("glioma", method="local", options=options)
+    assert error.value.status_code == 504
+    assert service.in_flight_queries.in_flight == 0
+
+    events = [event async for event in service.stream_query("glioma", method="local", options=options)]
+    assert events == [("error", {"detail": "Query exceeded its latency budget of 100 ms"})]
+
+
+@pytest.mark.asyncio
+async def test_unbudgeted_timeouts_are_plain_failures():
+    class TimingOutRAG:
+        async def aquery(self, query, param):
+            raise TimeoutError()
+
+    service = GraphRAGService()
+    service.rag = TimingOutRAG()
+
+    with pytest.raises(HTTPException) as error:
+        await service.run_query_with_status("glioma", method="local")
+    assert error.value.status_code == 500
+    events = [event async for event in service.stream_query("glioma", method="local")]
+    assert [event for event, _ in events] == ["error"]
+
+
+@pytest.mark.asyncio
+async def test_timed_out_llm_calls_do_not_use_up_capacity(tmp_path):
+    async def llm(prompt, **kwargs):
+        if prompt == "slow":
+            await asyncio.sleep(1)
+        return prompt
+
+    async def embed(texts):
+        return [[0.0] * 4 for _ in texts]
+
+    service = GraphRAGService(storage={"graph_storage": "NetworkXStorage", "vector_storage": "NanoVectorDBStorage", "kv_storage": "JsonKVStorage"})
+    service._llm_func = service.scheduler.wrap_llm(llm, "llm")
+    service._embedding_func = EmbeddingFunc(embedding_dim=4, max_token_size=512, func=embed)
+    rag = service._build_rag(str(tmp_path))
+
+    for _ in range(100):
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0):
+                await rag.llm_model_func("slow")
+
+    # LightRAG's limiter would spin forever here once its counter had leaked past the limit
+    async with asyncio.timeout(1):
+        assert await rag.llm_model_func("fast") == "fast"
+    assert service.scheduler.stats()["llm"]["active"] == 0
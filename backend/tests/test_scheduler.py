@@ -0,0 +1,187 @@
+import asyncio
+import httpx
+import numpy as np
+import pytest
+from openai import AsyncOpenAI
+from src.graph_rag import openai_llm
+from lightrag.utils import EmbeddingFunc
+from src.graph_rag.scheduler import BULK, INTERACTIVE, LLMScheduler, llm_priority
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_jump_ahead_of_bulk():
+    scheduler = LLMScheduler()
+    scheduler.configure("llm", 100000, 10_000_000, max_concurrency=1)
+    release = asyncio.Event()
+    order = []
+
+    async def complete(prompt, system_prompt=None, history_messages=[], **kwargs):
+        order.append(prompt)
+        if prompt == "first":
+            await release.wait()
+        return prompt
+
+    llm = scheduler.wrap_llm(complete, "llm")
+
+    async def call(prompt, lane):
+        with llm_priority(lane):
+            return await llm(prompt)
+
+    first = asyncio.create_task(call("first", BULK))
+    await asyncio.sleep(0)
+    bulk = asyncio.create_task(call("bulk", BULK))
+    query = asyncio.create_task(call("query", INTERACTIVE))
+    await asyncio.sleep(0)
+    assert scheduler.stats()["llm"]["queued"] == {"interactive": 1, "bulk": 1}
+
+    release.set()
+    await asyncio.gather(first, bulk, query)
+    assert order == ["first", "query", "bulk"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_halves_concurrency(monkeypatch):
+    monkeypatch.setattr("src.graph_rag.scheduler.RATE_LIMIT_ATTEMPTS", 1)
+    scheduler = LLMScheduler()
+    scheduler.configure("llm", 100000, 10_000_000, max_concurrency=8)
+
+    async def throttled(prompt, **kwargs):
+        raise RateLimitError()
+
+    with pytest.raises(RateLimitError):
+        await scheduler.wrap_llm(throttled, "llm")("hello")
+
+    stats = scheduler.stats()["llm"]
+    assert (stats["concurrency_limit"], stats["rate_limited"], stats["active"]) == (4, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_delays_calls_over_budget():
+    scheduler = LLMScheduler()
+    scheduler.configure("llm", requests_per_minute=600, tokens_per_minute=10_000_000, max_concurrency=4)
+    limiter = scheduler._limiter("llm")
+    limiter.requests.tokens = 0
+
+    async def complete(prompt, **kwargs):
+        return prompt
+
+    started = asyncio.get_running_loop().time()
+    await scheduler.wrap_llm(complete, "llm")("hello")
+
+    assert asyncio.get_running_loop().time() - started >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_interactive_call_is_not_held_behind_a_bulk_call_waiting_for_tokens():
+    scheduler = LLMScheduler()
+    scheduler.configure("llm", 100000, tokens_per_minute=60_000, max_concurrency=4)
+    scheduler._limiter("llm").tokens.tokens = 0
+
+    async def complete(prompt, **kwargs):
+        return prompt
+
+    llm = scheduler.wrap_llm(complete, "llm")
+
+    async def call(prompt, lane):
+        with llm_priority(lane):
+            return await llm(prompt)
+
+    # 40000 estimated tokens at 1000 per second: a 40 s wait for the bulk call
+    bulk = asyncio.create_task(call("x" * 160_000, BULK))
+    await asyncio.sleep(0)
+    started = asyncio.get_running_loop().time()
+    assert await asyncio.wait_for(call("query", INTERACTIVE), 1) == "query"
+    assert asyncio.get_running_loop().time() - started < 0.5
+    bulk.cancel()
+
+
+@pytest.mark.asyncio
+async def test_wrap_embedding_keeps_attributes():
+    async def embed(texts):
+        return np.zeros((len(texts), 3))
+
+    scheduler = LLMScheduler()
+    wrapped = scheduler.wrap_embedding(EmbeddingFunc(embedding_dim=3, max_token_size=512, func=embed), "embedder")
+
+    assert (wrapped.embedding_dim, wrapped.max_token_size) == (3, 512)
+    assert (await wrapped(["a", "b"])).shape == (2, 3)
+    assert scheduler.stats()["embedder"]["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_calls_are_retried_through_the_queue(monkeypatch):
+    monkeypatch.setattr("src.graph_rag.scheduler.RATE_LIMIT_COOLDOWN", 0.05)
+    scheduler = LLMScheduler()
+    scheduler.configure("llm", 100000, 10_000_000, max_concurrency=8)
+    calls = []
+
+    async def complete(prompt, **kwargs):
+        calls.append(asyncio.get_running_loop().time())
+        if len(calls) == 1:
+            raise RateLimitError()
+        return prompt
+
+    assert await scheduler.wrap_llm(complete, "llm")("hello") == "hello"
+
+    # The retry waited out the cooldown in the queue rather than inside the call
+    assert calls[1] - calls[0] >= 0.04
+    stats = scheduler.stats()["llm"]
+    assert (stats["concurrency_limit"], stats["rate_limited"], stats["completed"], stats["active"]) == (4, 1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_streams_hold_their_slot_until_consumed():
+    scheduler = LLMScheduler()
+    scheduler.configure("llm", 100000, 10_000_000, max_concurrency=1)
+
+    async def tokens():
+        for token in ["a", "b"]:
+            yield token
+
+    async def complete(prompt, stream=False, **kwargs):
+        return tokens() if stream else prompt
+
+    llm = scheduler.wrap_llm(complete, "llm")
+    stream = await llm("hello", stream=True)
+    assert scheduler.stats()["llm"]["active"] == 1
+    waiting = asyncio.create_task(llm("next"))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    assert [token async for token in stream] == ["a", "b"]
+    assert await waiting == "next"
+    assert scheduler.stats()["llm"]["completed"] == 2
+
+    # Closing a stream early frees the slot without counting it as completed
+    stream = await llm("hello", stream=True)
+    await stream.aclose()
+    stats = scheduler.stats()["llm"]
+    assert (stats["active"], stats["completed"]) == (0, 2)
+
+
+@pytest.mark.asyncio
+async def test_openai_rate_limits_reach_the_scheduler_on_the_first_attempt(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(429, json={"error": {"message": "slow down"}})
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(openai_llm, "_client", None)
+    monkeypatch.setattr(openai_llm, "AsyncOpenAI", lambda **kwargs: AsyncOpenAI(http_client=httpx.AsyncClient(transport=transport), **kwargs))
+    monkeypatch.setattr("src.graph_rag.scheduler.RATE_LIMIT_ATTEMPTS", 1)
+    scheduler = LLMScheduler()
+    scheduler.configure("llm", 100000, 10_000_000, max_concurrency=8)
+
+    with pytest.raises(Exception) as error:
+        await scheduler.wrap_llm(openai_llm.openai_complete, "llm")("hello")
+
+    assert error.value.status_code == 429
+    assert len(requests) == 1
+    assert scheduler.stats()["llm"]["rate_limited"] == 1
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from src.graph_rag.services import GraphRAGService
+from src.graph_rag.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "answer"
+
+    waiters = [asyncio.create_task(flight.do("q", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["answer"] * 5
+    assert calls == 1
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "answer"
+
+    leader = asyncio.create_task(flight.do("q", work))
+    follower = asyncio.create_task(flight.do("q", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "answer"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_work_is_cancelled_when_every_caller_leaves():
+    flight = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(flight.do("q", work))
+    await asyncio.sleep(0)
+    caller.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_run_query_coalesces_identical_queries():
+    class SlowRAG:
+        calls = 0
+
+        async def aquery(self, query, param):
+            SlowRAG.calls += 1
+            await asyncio.sleep(0.01)
+            return "shared answer"
+
+    service = GraphRAGService()
+    service.rag = SlowRAG()
+
+    results = await asyncio.gather(*[service.run_query("What is glioma?", method="naive") for _ in range(4)])
+
+    assert results == ["shared answer"] * 4
+    assert SlowRAG.calls == 1
@@ -0,0 +1,165 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from lightrag.storage import JsonKVStorage, NetworkXStorage
+from src.graph_rag import snapshot
+from src.graph_rag.storage import custom_pinecone
+from src.graph_rag.storage.custom_pinecone import PineconeVectorDBStorage
+from src.graph_rag.storage.memory_graph import CSRGraphStorage
+
+
+class FakeIndex:
+    def __init__(self):
+        self.namespaces = {}
+        self.fetched = []
+
+    def list(self, namespace, limit):
+        ids = sorted(self.namespaces.get(namespace, {}))
+        for i in range(0, len(ids), limit):
+            yield ids[i:i + limit]
+
+    def fetch(self, ids, namespace):
+        self.fetched.append(len(ids))
+        vectors = self.namespaces[namespace]
+        return SimpleNamespace(vectors={i: SimpleNamespace(id=i, values=vectors[i][0], metadata=vectors[i][1]) for i in ids})
+
+    def upsert(self, vectors, namespace, **kwargs):
+        for vector_id, values, metadata in vectors:
+            self.namespaces.setdefault(namespace, {})[vector_id] = (values, metadata)
+
+
+@pytest.fixture
+def pinecone(monkeypatch):
+    indexes = {}
+    monkeypatch.setattr(custom_pinecone, "ensure_pinecone_index", lambda name, dim: None)
+    monkeypatch.setattr(custom_pinecone, "get_pinecone_index", lambda name: indexes.setdefault(name, FakeIndex()))
+    return indexes
+
+
+def make_rag(working_dir, project):
+    config = {"working_dir": str(working_dir), "embedding_batch_num": 32, "addon_params": {"project": project}}
+    embedding_func = SimpleNamespace(embedding_dim=4)
+    os.makedirs(working_dir, exist_ok=True)
+    vdb = {name: PineconeVectorDBStorage(namespace=name, global_config=config, embedding_func=embedding_func, meta_fields={"entity_name"})
+           for name in ("entities", "relationships", "chunks")}
+    return SimpleNamespace(
+        chunk_entity_relation_graph=CSRGraphStorage(namespace="chunk_entity_relation", global_config=config, embedding_func=None),
+        entities_vdb=vdb["entities"],
+        relationships_vdb=vdb["relationships"],
+        chunks_vdb=vdb["chunks"],
+        full_docs=JsonKVStorage(namespace="full_docs", global_config=config, embedding_func=None),
+        text_chunks=JsonKVStorage(namespace="text_chunks", global_config=config, embedding_func=None),
+        llm_response_cache=None,
+        embedding_func=embedding_func,
+        graph_storage="CSRGraphStorage",
+        vector_storage="CustomPineconeVectorDBStorage",
+        kv_storage="JsonKVStorage",
+    )
+
+
+async def fill(rag):
+    graph = rag.chunk_entity_relation_graph
+    for i in range(5):
+        await graph.upsert_node(f"E{i}", {"entity_type": "ORG", "description": f"entity {i}"})
+    for i in range(4):
+        await graph.upsert_edge(f"E{i}", f"E{i + 1}", {"weight": float(i), "keywords": "related"})
+    await rag.entities_vdb.upsert_vectors([
+        {"id": f"ent-{i}", "values": [0.5, -1.0, 0.25, float(i)], "metadata": {"entity_name": f"E{i}"}} for i in range(3)
+    ])
+    await rag.full_docs.upsert({"doc-1": {"content": "full text"}})
+    await rag.text_chunks.upsert({f"chunk-{i}": {"content": f"chunk {i}", "full_doc_id": "doc-1"} for i in range(3)})
+
+
+@pytest.mark.asyncio
+async def test_round_trip_into_another_project(tmp_path, pinecone):
+    source = make_rag(tmp_path / "source", "source")
+    await fill(source)
+
+    manifest = await snapshot.export_snapshot(source, str(tmp_path / "snap"), "source", part_size=2)
+
+    assert manifest["streams"]["chunk_entity_relation.nodes"]["records"] == 5
+    assert len(manifest["streams"]["chunk_entity_relation.nodes"]["parts"]) == 3
+    assert not os.path.exists(tmp_path / "snap" / snapshot.EXPORT_PROGRESS)
+
+    target = make_rag(tmp_path / "target", "target")
+    loaded = await snapshot.import_snapshot(target, str(tmp_path / "snap"), "target")
+
+    assert loaded["chunk_entity_relation.edges"] == 4
+    graph = target.chunk_entity_relation_graph
+    assert await graph.get_node("E2") == {"entity_type": "ORG", "description": "entity 2"}
+    assert sorted(await graph.get_node_edges("E2")) == [("E2", "E1"), ("E2", "E3")]
+    assert pinecone["entities"].namespaces["target"]["ent-2"] == ([0.5, -1.0, 0.25, 2.0], {"entity_name": "E2"})
+    assert await target.text_chunks.get_by_id("chunk-1") == {"content": "chunk 1", "full_doc_id": "doc-1"}
+    # Import persisted the file-backed stores
+    assert sorted(await make_rag(tmp_path / "target", "target").chunk_entity_relation_graph.get_all_nodes()) == [f"E{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_export_indexes_graph_ids_and_pages_vectors_by_batch_size(tmp_path, pinecone):
+    source = make_rag(tmp_path / "source", "source")
+    await fill(source)
+    indexed = []
+    source.chunk_entity_relation_graph.ensure_id_index = lambda: indexed.append(True)
+
+    await snapshot.export_snapshot(source, str(tmp_path / "snap"), "source", batch_size=2)
+
+    assert indexed == [True]
+    assert pinecone["entities"].fetched == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_import_resumes_after_failure(tmp_path, pinecone):
+    source = make_rag(tmp_path / "source", "source")
+    await fill(source)
+    await snapshot.export_snapshot(source, str(tmp_path / "snap"), part_size=2)
+
+    target = make_rag(tmp_path / "target", "target")
+    graph = target.chunk_entity_relation_graph
+    loaded_nodes = []
+    upsert_nodes = graph.upsert_nodes
+
+    async def flaky_upsert_edges(edges):
+        raise ConnectionError("lost connection")
+
+    async def counting_upsert_nodes(nodes):
+        loaded_nodes.extend(node_id for node_id, _ in nodes)
+        await upsert_nodes(nodes)
+
+    graph.upsert_nodes = counting_upsert_nodes
+    graph.upsert_edges = flaky_upsert_edges
+    with pytest.raises(ConnectionError):
+        await snapshot.import_snapshot(target, str(tmp_path / "snap"), "target")
+    assert os.path.exists(tmp_path / "snap" / snapshot.IMPORT_PROGRESS)
+
+    del graph.upsert_edges
+    loaded = await snapshot.import_snapshot(target, str(tmp_path / "snap"), "target")
+
+    assert "chunk_entity_relation.nodes" not in loaded
+    assert sorted(loaded_nodes) == [f"E{i}" for i in range(5)]
+    assert await graph.get_edge("E3", "E4") == {"weight": 3.0, "keywords": "related"}
+    assert not os.path.exists(tmp_path / "snap" / snapshot.IMPORT_PROGRESS)
+
+
+@pytest.mark.asyncio
+async def test_export_rejects_storage_without_bulk_methods(tmp_path, pinecone):
+    rag = make_rag(tmp_path / "source", "source")
+    rag.chunk_entity_relation_graph = NetworkXStorage(namespace="chunk_entity_relation", global_config={"working_dir": str(tmp_path)}, embedding_func=None)
+
+    with pytest.raises(ValueError, match="NetworkXStorage.iter_nodes"):
+        await snapshot.export_snapshot(rag, str(tmp_path / "snap"))
+
+
+@pytest.mark.asyncio
+async def test_import_graphml(tmp_path, pinecone):
+    networkx_graph = NetworkXStorage(namespace="chunk_entity_relation", global_config={"working_dir": str(tmp_path)}, embedding_func=None)
+    await networkx_graph.upsert_node("A", {"entity_type": "PERSON"})
+    await networkx_graph.upsert_edge("A", "B", {"weight": 2.0})
+    await networkx_graph.index_done_callback()
+
+    rag = make_rag(tmp_path / "target", None)
+    counts = await snapshot.import_graphml(rag, str(tmp_path / "graph_chunk_entity_relation.graphml"))
+
+    assert counts == {"nodes": 2, "edges": 1}
+    assert await rag.chunk_entity_relation_graph.get_node("A") == {"entity_type": "PERSON"}
+    assert await rag.chunk_entity_relation_graph.get_edge("B", "A") == {"weight": 2.0}
@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+import main
+from src.graph_rag import routes
+from src.graph_rag.dependencies import get_graph_rag_service
+from src.graph_rag.models import RetrievalOptions
+from src.graph_rag.services import GraphRAGService
+
+
+class StreamingRAG:
+    def __init__(self):
+        self.closed = False
+
+    async def aquery(self, query, param):
+        assert param.only_need_context
+        return "-----Entities-----\nGLIOMA"
+
+    async def llm_model_func(self, query, system_prompt=None, stream=False):
+        assert stream and "GLIOMA" in system_prompt
+
+        async def tokens():
+            try:
+                for piece in ["Glioma ", "is ", "a tumour."]:
+                    yield piece
+            finally:
+                self.closed = True
+
+        return tokens()
+
+
+async def collect(body):
+    return [chunk async for chunk in body]
+
+
+@pytest.fixture
+def streaming_service():
+    service = GraphRAGService()
+    service.rag = StreamingRAG()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_stream_query_emits_metadata_then_tokens(streaming_service):
+    events = [event async for event in streaming_service.stream_query("What is glioma?", method="local")]
+
+    assert events[0][0] == "metadata"
+    assert events[0][1]["cache"] == "MISS"
+    assert [data for event, data in events if event == "token"] == ["Glioma ", "is ", "a tumour."]
+    assert events[-1] == ("done", {})
+    assert streaming_service.rag.closed
+
+    cached = [event async for event in streaming_service.stream_query("what is glioma?", method="local")]
+    assert cached == [("metadata", {"mode": "local", "cache": "HIT"}), ("token", "Glioma is a tumour."), ("done", {})]
+
+
+@pytest.mark.asyncio
+async def test_generation_time_excludes_the_client_reading(streaming_service):
+    def generation_seconds():
+        return REGISTRY.get_sample_value("graphrag_stage_seconds_sum", {"pipeline": "query", "stage": "generation"}) or 0.0
+
+    before = generation_seconds()
+    async for event, _ in streaming_service.stream_query("What is glioma?", method="local"):
+        if event == "token":
+            await asyncio.sleep(0.05)
+
+    assert generation_seconds() - before < 0.05
+
+
+def test_search_stream_route_sends_sse(streaming_service, monkeypatch):
+    monkeypatch.setitem(main.app.dependency_overrides, get_graph_rag_service, lambda: streaming_service)
+    checks = []
+
+    async def is_disconnected(self):
+        checks.append(True)
+        return False
+
+    monkeypatch.setattr(Request, "is_disconnected", is_disconnected)
+
+    response = TestClient(main.app).get("/api/v1/search/stream", params={"q": "What is glioma?", "method": "local"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: metadata\ndata: ")
+    assert 'event: token\ndata: "is "\n\n' in response.text
+    assert response.text.endswith("event: done\ndata: {}\n\n")
+    # Disconnects are polled on an interval, not before every event
+    assert len(checks) <= 1
+
+
+@pytest.mark.asyncio
+async def test_disconnect_during_retrieval_cancels_the_query(monkeypatch):
+    monkeypatch.setattr(routes, "DISCONNECT_CHECK_SECONDS", 0.01)
+    cancelled = asyncio.Event()
+
+    class StuckRAG:
+        async def aquery(self, query, param):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    class DisconnectedRequest:
+        async def is_disconnected(self):
+            return True
+
+    service = GraphRAGService()
+    service.rag = StuckRAG()
+    response = await routes.search_stream_api(q="glioma", request=DisconnectedRequest(), method="local", options=RetrievalOptions(), graph_rag_service=service)
+
+    events = await asyncio.wait_for(collect(response.body_iterator), 1)
+
+    assert events == []
+    assert cancelled.is_set()
@@ -0,0 +1,154 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.graph_rag.services import GraphRAGService
+from src.graph_rag.storage.custom_neo4j import node_label
+from src.graph_rag.tenancy import ProjectPool, validate_project
+
+
+class NamedRAG:
+    def __init__(self, name):
+        self.name = name
+
+    async def aquery(self, query, param):
+        return f"{self.name}: {query}"
+
+
+@pytest.mark.asyncio
+async def test_pool_creates_each_project_once_and_evicts_lru():
+    created = []
+
+    async def factory(project):
+        created.append(project)
+        return NamedRAG(project)
+
+    pool = ProjectPool(factory, max_instances=2, idle_ttl=60)
+    for project in ["a", "b", "a", "c"]:
+        async with pool.acquire(project) as rag:
+            assert rag.name == project
+
+    assert created == ["a", "b", "c"]
+    assert "b" not in pool
+    assert "a" in pool and "c" in pool
+
+
+@pytest.mark.asyncio
+async def test_pool_keeps_instances_in_use():
+    async def factory(project):
+        return NamedRAG(project)
+
+    pool = ProjectPool(factory, max_instances=1, idle_ttl=0)
+    async with pool.acquire("a"):
+        async with pool.acquire("b"):
+            assert "a" in pool and "b" in pool
+        assert "a" in pool and "b" not in pool
+    assert "a" not in pool
+
+
+@pytest.mark.asyncio
+async def test_pool_creates_once_under_concurrency_and_retries_failures():
+    calls = []
+
+    async def factory(project):
+        calls.append(project)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("neo4j unavailable")
+        return NamedRAG(project)
+
+    pool = ProjectPool(factory)
+
+    async def use():
+        async with pool.acquire("a") as rag:
+            return rag
+
+    results = await asyncio.gather(use(), use(), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    first, second = await asyncio.gather(use(), use())
+    assert first is second
+    assert calls == ["a", "a"]
+
+
+@pytest.mark.asyncio
+async def test_evicted_instances_are_flushed_before_recreation():
+    events = []
+
+    class FlushingRAG(NamedRAG):
+        def __init__(self, name):
+            super().__init__(name)
+            self.chunk_entity_relation_graph = self
+
+        async def flush(self):
+            await asyncio.sleep(0.01)
+            events.append(f"flushed {self.name}")
+
+    async def factory(project):
+        events.append(f"created {project}")
+        return FlushingRAG(project)
+
+    pool = ProjectPool(factory, idle_ttl=0)
+    async with pool.acquire("a"):
+        pass
+    async with pool.acquire("a"):
+        pass
+    await pool.close()
+
+    assert events == ["created a", "flushed a", "created a", "flushed a"]
+
+
+@pytest.mark.asyncio
+async def test_new_instance_is_not_evicted_before_its_caller_gets_it():
+    gate = asyncio.Event()
+
+    async def factory(project):
+        if project == "b":
+            await gate.wait()
+        return NamedRAG(project)
+
+    pool = ProjectPool(factory, max_instances=1, idle_ttl=60)
+    leave_c = asyncio.Event()
+
+    async def hold(project, until):
+        async with pool.acquire(project) as rag:
+            await until.wait()
+            return rag.name
+
+    async with pool.acquire("a"):
+        c = asyncio.create_task(hold("c", leave_c))
+        b = asyncio.create_task(hold("b", asyncio.Event()))
+        await asyncio.sleep(0)
+        # "b" is published while its caller has yet to resume, and "c" leaving runs evict() in between
+        gate.set()
+        leave_c.set()
+        assert await c == "c"
+        await asyncio.sleep(0.01)
+        assert not b.done() and "b" in pool
+        b.cancel()
+
+
+def test_project_names_are_validated():
+    assert validate_project("oncology-2024") == "oncology-2024"
+    with pytest.raises(HTTPException) as exc:
+        validate_project("../other")
+    assert exc.value.status_code == 400
+    assert (node_label(None), node_label("onc")) == ("Node", "Node_onc")
+
+
+@pytest.mark.asyncio
+async def test_queries_are_routed_and_cached_per_project():
+    service = GraphRAGService()
+    service.rag = NamedRAG("default")
+
+    async def factory(project):
+        return NamedRAG(project)
+
+    service.projects.factory = factory
+
+    assert await service.run_query("EGFR", method="naive") == "default: EGFR"
+    assert await service.run_query("EGFR", method="naive", project="onc") == "onc: EGFR"
+    result, cache_status = await service.run_query_with_status("EGFR", method="naive", project="onc")
+    assert (result, cache_status) == ("onc: EGFR", "HIT")
+
+    with pytest.raises(HTTPException) as exc:
+        await service.run_query("EGFR", project="bad/name")
+    assert exc.value.status_code == 400
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+import main
+from src.graph_rag.dependencies import get_graph_rag_service
+from src.graph_rag.metrics import instrument_storage
+from src.graph_rag.services import GraphRAGService
+from src.graph_rag.singleflight import SingleFlight
+from src.utils import tracing
+from src.utils.tracing import JsonFileExporter, current_span, detached_context, span, start_trace
+
+
+def test_span_outside_trace_records_nothing():
+    with span("neo4j.get_node") as current:
+        assert current is None
+
+
+def test_exporter_writes_otlp_json(tmp_path):
+    with start_trace("GET /search") as root:
+        with span("llm", model="gpt-4o-mini", estimated_tokens=12):
+            pass
+        with pytest.raises(RuntimeError):
+            with span("pinecone.query"):
+                raise RuntimeError("timeout")
+
+    path = tmp_path / "traces.jsonl"
+    JsonFileExporter(str(path)).export(root)
+    spans = json.loads(path.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+    assert [s["name"] for s in spans] == ["GET /search", "llm", "pinecone.query"]
+    assert {s["traceId"] for s in spans} == {root.trace_id}
+    assert spans[1]["parentSpanId"] == root.span_id
+    assert {"key": "estimated_tokens", "value": {"intValue": "12"}} in spans[1]["attributes"]
+    assert spans[2]["status"] == {"code": 2, "message": "RuntimeError: timeout"}
+
+
+def test_search_debug_returns_span_tree(monkeypatch, tmp_path):
+    @instrument_storage("fake")
+    class FakeGraph:
+        async def get_node(self, node_id):
+            return {"id": node_id}
+
+    class FakeRAG:
+        graph = FakeGraph()
+
+        async def aquery(self, query, param):
+            await self.graph.get_node("EGFR")
+            return "An answer"
+
+    service = GraphRAGService()
+    service.rag = FakeRAG()
+    monkeypatch.setitem(main.app.dependency_overrides, get_graph_rag_service, lambda: service)
+    exported = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "_exporter", JsonFileExporter(str(exported)))
+
+    response = TestClient(main.app).get("/api/v1/search", params={"q": "EGFR", "method": "naive", "debug": "true"})
+
+    trace = response.json()["trace"]
+    assert trace["name"] == "GET /api/v1/search"
+    # The aquery runs once for every identical concurrent request, in a trace of its own
+    shared = trace["links"][0]
+    assert shared["name"] == "query.shared"
+    aquery = next(child for child in shared["children"] if child["name"] == "query.aquery_naive")
+    assert [child["name"] for child in aquery["children"]] == ["fake.get_node"]
+    traces = [json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"] for line in exported.read_text().splitlines()]
+    request_spans = next(spans for spans in traces if spans[0]["traceId"] == response.headers["X-Trace-Id"])
+    assert request_spans[0]["links"] == [{"traceId": traces[0][0]["traceId"], "spanId": traces[0][0]["spanId"]}]
+
+
+def test_stream_spans_are_exported_with_the_request_trace(monkeypatch, tmp_path):
+    class StreamingRAG:
+        async def aquery(self, query, param):
+            return "-----Entities-----\nEGFR"
+
+        async def llm_model_func(self, query, system_prompt=None, stream=False):
+            async def tokens():
+                yield "An "
+                yield "answer"
+
+            return tokens()
+
+    service = GraphRAGService()
+    service.rag = StreamingRAG()
+    monkeypatch.setitem(main.app.dependency_overrides, get_graph_rag_service, lambda: service)
+    exported = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "_exporter", JsonFileExporter(str(exported)))
+
+    response = TestClient(main.app).get("/api/v1/search/stream", params={"q": "EGFR", "method": "local"})
+
+    assert response.text.endswith("event: done\ndata: {}\n\n")
+    traces = [json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"] for line in exported.read_text().splitlines()]
+    spans = next(spans for spans in traces if spans[0]["traceId"] == response.headers["X-Trace-Id"])
+    names = [s["name"] for s in spans]
+    assert names[0] == "GET /api/v1/search/stream"
+    assert "query.retrieval_local" in names and "query.generation" in names
+    assert int(spans[0]["endTimeUnixNano"]) >= max(int(s["endTimeUnixNano"]) for s in spans)
+
+
+@pytest.mark.asyncio
+async def test_background_tasks_do_not_join_the_request_trace():
+    async def work():
+        with span("storage.call"):
+            return current_span()
+
+    with start_trace("POST /upload") as root:
+        assert await SingleFlight().do("key", work) is None
+        assert await asyncio.create_task(work(), context=detached_context()) is None
+        assert current_span() is root
+
+    assert root.children == []
@@ -0,0 +1,57 @@
+import asyncio
+import io
+from pathlib import Path
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import Headers, UploadFile
+from src.graph_rag.services import GraphRAGService
+
+
+def make_upload(name, content, content_type="text/plain"):
+    return UploadFile(
+        io.BytesIO(content),
+        size=len(content),
+        filename=name,
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+@pytest.fixture
+def upload_service(tmp_path):
+    service = GraphRAGService(base_path=str(tmp_path))
+    (tmp_path / "input").mkdir()
+    service.rag = object()  # ingest_file is replaced below, so no real LightRAG is needed
+    return service
+
+
+@pytest.mark.asyncio
+async def test_upload_files_queues_jobs(upload_service, monkeypatch):
+    ingested = []
+
+    async def fake_ingest(path, kind, project=None):
+        ingested.append((path.read_bytes(), kind))
+        return 1
+
+    monkeypatch.setattr(upload_service, "ingest_file", fake_ingest)
+
+    jobs = await upload_service.upload_files([
+        make_upload("notes.txt", b"glioblastoma"),
+        make_upload("paper.pdf", b"%PDF-1.4", "application/pdf"),
+    ])
+
+    assert [job.status for job in jobs] == ["queued", "queued"]
+    await asyncio.gather(*upload_service._job_tasks.values())
+    assert [upload_service.get_job(job.job_id).status for job in jobs] == ["done", "done"]
+    assert sorted(ingested) == [(b"%PDF-1.4", "pdf"), (b"glioblastoma", "text")]
+    assert list(Path(upload_service.input_path).iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_upload_files_rejects_oversized(upload_service, monkeypatch):
+    monkeypatch.setattr("src.graph_rag.services.MAX_UPLOAD_BYTES", 4)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await upload_service.upload_files([make_upload("big.txt", b"too large")])
+
+    assert exc_info.value.status_code == 413
+    assert upload_service.jobs == {}